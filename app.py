@@ -1,4 +1,12 @@
 from htm_dashboard.layout import layout
+from htm_dashboard.api import api
+from htm_dashboard.server import configure_server
+from htm_dashboard.groups import GROUPS
+from htm_dashboard.tab import TAB_STATE_PROPS
+from htm_dashboard.debounce import make_debounce_function
+from htm_dashboard.metrics import instrument, configure_metrics
+from htm_dashboard.profiler import profile
+from htm_dashboard import background
 import htm_dashboard.callbacks as cb
 
 import dash
@@ -8,14 +16,21 @@ from dash_bootstrap_templates import ThemeSwitchAIO
 # stylesheet with the .dbc class
 dbc_css = "https://cdn.jsdelivr.net/gh/AnnMarieW/dash-bootstrap-templates/dbc.min.css"
 
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.MINTY, dbc_css])
+# the components of the tabs are only in the layout when they are selected
+app = dash.Dash(
+    __name__,
+    external_stylesheets=[dbc.themes.MINTY, dbc_css],
+    suppress_callback_exceptions=True,
+    background_callback_manager=background.MANAGER,
+)
 
 server = app.server
+server.register_blueprint(api)
+configure_server(app)
+configure_metrics(app, background.QUEUE)
 
 app.layout = layout
 
-ACTIVE_GROUPS = ["diffusivity", "solubility", "recombination_coeff"]
-
 
 @app.callback(
     dash.Output("modal-infos", "is_open"),
@@ -28,7 +43,28 @@ def toggle_modal(n1, is_open):
     return is_open
 
 
-for group in ACTIVE_GROUPS:
+def wrap(function, group="", queue=None):
+    """Instruments and optionally profiles a callback, queue is the job
+    queue of the background callbacks (see metrics.instrument)"""
+    return instrument(profile(function, group), group, queue)
+
+
+app.callback(
+    dash.Output("tab_content", "children"),
+    dash.Input("tabs-example-graph", "active_tab"),
+    [dash.State(f"tab_state_{group}", "data") for group in GROUPS],
+)(wrap(cb.render_tab))
+
+
+for group in GROUPS:
+
+    app.callback(
+        dash.Output(f"tab_state_{group}", "data"),
+        [
+            dash.Input(f"{key.rsplit('.', 1)[0]}_{group}", key.rsplit(".", 1)[1])
+            for key in TAB_STATE_PROPS
+        ],
+    )(wrap(cb.create_save_tab_state_function(group), group))
 
     app.callback(
         dash.Output(f"graph_nb_citations_{group}", "figure"),
@@ -38,28 +74,54 @@ for group in ACTIVE_GROUPS:
         dash.State(f"isotope_filter_{group}", "value"),
         dash.State(f"author_filter_{group}", "value"),
         dash.State(f"year_filter_{group}", "value"),
-    )(cb.create_make_citations_figure_function(group))
+    )(wrap(cb.create_make_citations_figure_function(group), group))
 
     app.callback(
         dash.Output(f"material_filter_{group}", "value"),
         dash.Input(f"add_all_materials_{group}", "n_clicks"),
-    )(cb.create_add_all_materials_function(group))
+    )(wrap(cb.create_add_all_materials_function(group), group))
 
     app.callback(
         dash.Output(f"author_filter_{group}", "value"),
         dash.Input(f"add_all_authors_{group}", "n_clicks"),
-    )(cb.create_add_all_authors_function(group))
+    )(wrap(cb.create_add_all_authors_function(group), group))
 
+    # the options are updated when the values change (ex: "All" button) so
+    # that they always contain the selected values
     app.callback(
-        dash.Output(f"graph_{group}", "figure"),
+        dash.Output(f"material_filter_{group}", "options"),
+        dash.Input(f"material_filter_{group}", "search_value"),
+        dash.Input(f"material_filter_{group}", "value"),
+        prevent_initial_call=True,
+    )(wrap(cb.create_search_materials_function(group), group))
+
+    app.callback(
+        dash.Output(f"author_filter_{group}", "options"),
+        dash.Input(f"author_filter_{group}", "search_value"),
+        dash.Input(f"material_filter_{group}", "value"),
+        dash.Input(f"author_filter_{group}", "value"),
+        prevent_initial_call=True,
+    )(wrap(cb.create_search_authors_function(group), group))
+
+    app.clientside_callback(
+        make_debounce_function(group),
+        dash.Output(f"filters_{group}", "data"),
         dash.Input(f"material_filter_{group}", "value"),
         dash.Input(f"isotope_filter_{group}", "value"),
         dash.Input(f"author_filter_{group}", "value"),
         dash.Input(f"year_filter_{group}", "value"),
+        prevent_initial_call=True,
+    )
+
+    app.callback(
+        dash.Output(f"graph_{group}", "figure"),
+        dash.Input(f"filters_{group}", "data"),
         dash.Input(f"mean_button_{group}", "n_clicks"),
         dash.Input(f"colour-by_{group}", "value"),
+        dash.Input(f"envelope_{group}", "value"),
         dash.Input(ThemeSwitchAIO.ids.switch("theme"), "value"),
-    )(cb.create_update_graph_function(group))
+        dash.State(f"graph_{group}", "figure"),
+    )(wrap(cb.create_update_graph_function(group), group))
 
     app.callback(
         dash.Output(f"graph_prop_per_year_{group}", "figure"),
@@ -68,7 +130,7 @@ for group in ACTIVE_GROUPS:
         dash.State(f"isotope_filter_{group}", "value"),
         dash.State(f"author_filter_{group}", "value"),
         dash.State(f"year_filter_{group}", "value"),
-    )(cb.create_update_entries_per_year_graph_function(group))
+    )(wrap(cb.create_update_entries_per_year_graph_function(group), group))
 
     app.callback(
         dash.Output(f"graph_materials_{group}", "figure"),
@@ -77,7 +139,7 @@ for group in ACTIVE_GROUPS:
         dash.State(f"isotope_filter_{group}", "value"),
         dash.State(f"author_filter_{group}", "value"),
         dash.State(f"year_filter_{group}", "value"),
-    )(cb.create_update_piechart_material_function(group))
+    )(wrap(cb.create_update_piechart_material_function(group), group))
 
     app.callback(
         dash.Output(f"graph_isotopes_{group}", "figure"),
@@ -86,7 +148,7 @@ for group in ACTIVE_GROUPS:
         dash.State(f"isotope_filter_{group}", "value"),
         dash.State(f"author_filter_{group}", "value"),
         dash.State(f"year_filter_{group}", "value"),
-    )(cb.create_update_piechart_isotopes_function(group))
+    )(wrap(cb.create_update_piechart_isotopes_function(group), group))
 
     app.callback(
         dash.Output(f"graph_authors_{group}", "figure"),
@@ -95,27 +157,43 @@ for group in ACTIVE_GROUPS:
         dash.State(f"isotope_filter_{group}", "value"),
         dash.State(f"author_filter_{group}", "value"),
         dash.State(f"year_filter_{group}", "value"),
-    )(cb.create_update_piechart_authors_function(group))
+    )(wrap(cb.create_update_piechart_authors_function(group), group))
 
+    # the exports run in the background (see htm_dashboard/background.py)
     app.callback(
         dash.Output(f"download-text_{group}", "data"),
         dash.Input(f"extract_button_{group}", "n_clicks"),
-        dash.Input(f"material_filter_{group}", "value"),
-        dash.Input(f"isotope_filter_{group}", "value"),
-        dash.Input(f"author_filter_{group}", "value"),
-        dash.Input(f"year_filter_{group}", "value"),
+        dash.State(f"material_filter_{group}", "value"),
+        dash.State(f"isotope_filter_{group}", "value"),
+        dash.State(f"author_filter_{group}", "value"),
+        dash.State(f"year_filter_{group}", "value"),
         prevent_initial_call=True,
-    )(cb.create_make_download_data_function(group))
+        **background.callback_options(group),
+    )(
+        wrap(
+            background.adapt(cb.create_make_download_data_function(group)),
+            group,
+            background.QUEUE,
+        )
+    )
 
     app.callback(
         dash.Output(f"download-python_{group}", "data"),
+        dash.Output(f"download-npz_{group}", "data"),
         dash.Input(f"python_button_{group}", "n_clicks"),
-        dash.Input(f"material_filter_{group}", "value"),
-        dash.Input(f"isotope_filter_{group}", "value"),
-        dash.Input(f"author_filter_{group}", "value"),
-        dash.Input(f"year_filter_{group}", "value"),
+        dash.State(f"material_filter_{group}", "value"),
+        dash.State(f"isotope_filter_{group}", "value"),
+        dash.State(f"author_filter_{group}", "value"),
+        dash.State(f"year_filter_{group}", "value"),
         prevent_initial_call=True,
-    )(cb.make_download_python_callback(group))
+        **background.callback_options(group),
+    )(
+        wrap(
+            background.adapt(cb.make_download_python_callback(group)),
+            group,
+            background.QUEUE,
+        )
+    )
 
     app.callback(
         dash.Output(f"modal_add_{group}", "is_open"),
@@ -129,14 +207,15 @@ for group in ACTIVE_GROUPS:
         dash.State(f"new_{group}_isotope", "value"),
         dash.State(f"new_{group}_material", "value"),
         prevent_initial_call=True,
-    )(cb.make_toggle_modal_function(group))
+    )(wrap(cb.make_toggle_modal_function(group), group))
 
     app.callback(
-        dash.Output(f"material_filter_{group}", "options"),
-        dash.Output(f"author_filter_{group}", "options"),
         dash.Output(f"error_message_new_{group}", "children"),
+        dash.Output(f"import_report_{group}", "children"),
+        dash.Output(f"material_filter_{group}", "options", allow_duplicate=True),
+        dash.Output(f"author_filter_{group}", "options", allow_duplicate=True),
         dash.Input(f"submit_new_{group}", "n_clicks"),
-        dash.Input(f"material_filter_{group}", "value"),
+        dash.Input(f"upload_{group}", "contents"),
         dash.State(f"new_{group}_pre_exp", "value"),
         dash.State(f"new_{group}_act_energy", "value"),
         dash.State(f"new_{group}_author", "value"),
@@ -145,8 +224,13 @@ for group in ACTIVE_GROUPS:
         dash.State(f"new_{group}_material", "value"),
         dash.State(f"new_{group}_range_low", "value"),
         dash.State(f"new_{group}_range_high", "value"),
+        dash.State(f"upload_{group}", "filename"),
+        dash.State(f"material_filter_{group}", "value"),
+        dash.State(f"author_filter_{group}", "value"),
+        dash.State(f"material_filter_{group}", "search_value"),
+        dash.State(f"author_filter_{group}", "search_value"),
         prevent_initial_call=True,
-    )(cb.make_add_property(group))
+    )(wrap(cb.make_add_property(group), group))
 
     app.callback(
         dash.Output(f"table_{group}", "data"),
@@ -155,7 +239,33 @@ for group in ACTIVE_GROUPS:
         dash.State(f"isotope_filter_{group}", "value"),
         dash.State(f"author_filter_{group}", "value"),
         dash.State(f"year_filter_{group}", "value"),
-    )(cb.create_update_table_data_function(group))
+    )(wrap(cb.create_update_table_data_function(group), group))
+
+    app.callback(
+        dash.Output(f"graph_discrepancy_{group}", "figure"),
+        dash.Input(f"graph_{group}", "figure"),
+        dash.Input(f"cluster_discrepancy_{group}", "on"),
+        dash.Input(f"subtabs_{group}", "active_tab"),
+        dash.State(f"material_filter_{group}", "value"),
+        dash.State(f"isotope_filter_{group}", "value"),
+        dash.State(f"author_filter_{group}", "value"),
+        dash.State(f"year_filter_{group}", "value"),
+    )(wrap(cb.create_update_discrepancy_graph_function(group), group))
+
+    app.callback(
+        dash.Output(f"ranking_table_{group}", "data"),
+        dash.Output(f"ranking_table_{group}", "page_count"),
+        dash.Output(f"ranking_table_{group}", "page_current"),
+        dash.Input(f"graph_{group}", "figure"),
+        dash.Input(f"ranking_temperature_{group}", "value"),
+        dash.Input(f"ranking_in_range_{group}", "on"),
+        dash.Input(f"ranking_table_{group}", "page_current"),
+        dash.State(f"ranking_table_{group}", "page_size"),
+        dash.State(f"material_filter_{group}", "value"),
+        dash.State(f"isotope_filter_{group}", "value"),
+        dash.State(f"author_filter_{group}", "value"),
+        dash.State(f"year_filter_{group}", "value"),
+    )(wrap(cb.create_update_ranking_table_function(group), group))
 
 if __name__ == "__main__":
     app.run_server(debug=True)
@@ -0,0 +1,86 @@
+import contextlib
+import json
+import tracemalloc
+
+import dash._callback_context
+import plotly
+import pytest
+
+from htm_dashboard import dataset
+from htm_dashboard.groups import type_to_database
+
+
+GROUPS = ["diffusivity", "solubility", "permeability"]
+
+FILTER_STATES = ["tungsten_default", "all_materials", "all_authors", "single_year"]
+
+
+def make_filter_state(group: str, state: str):
+    """Returns the filters of a representative state of a tab
+
+    Args:
+        group (str): a group of GROUPS
+        state (str): "tungsten_default" (the initial state of the tab),
+            "all_materials" (all materials and authors), "all_authors"
+            (tungsten with all the authors selected) or "single_year" (all
+            materials and authors for the year with the most properties)
+
+    Returns:
+        dict: "materials", "isotopes", "authors", "years"
+    """
+    years = [prop.year for prop in type_to_database[group]]
+    filters = {
+        "materials": ["tungsten"],
+        "isotopes": ["H", "D", "T"],
+        "authors": dataset.author_options(group, materials=["tungsten"]),
+        "years": [min(years), max(years)],
+    }
+    if state in ["all_materials", "single_year"]:
+        filters["materials"] = dataset.material_options(group)
+    if state in ["all_materials", "all_authors", "single_year"]:
+        filters["authors"] = dataset.author_options(group)
+    if state == "single_year":
+        year = max(set(years), key=years.count)
+        filters["years"] = [year, year]
+    return filters
+
+
+@pytest.fixture(params=GROUPS)
+def group(request):
+    return request.param
+
+
+@pytest.fixture(params=FILTER_STATES)
+def filters(request, group):
+    return make_filter_state(group, request.param)
+
+
+def payload_size(figure):
+    """Returns the size in bytes of a figure or data as sent by Dash"""
+    return len(json.dumps(figure, cls=plotly.utils.PlotlyJSONEncoder))
+
+
+def measure(benchmark, function, *args, **kwargs):
+    """Benchmarks the wall time of a function and records the peak memory
+    of one extra call in benchmark.extra_info
+
+    Returns:
+        the output of the function
+    """
+    tracemalloc.start()
+    function(*args, **kwargs)
+    benchmark.extra_info["peak_memory"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return benchmark(function, *args, **kwargs)
+
+
+@contextlib.contextmanager
+def triggered(prop_id: str):
+    """Calls callbacks outside of a request as if prop_id had changed"""
+    token = dash._callback_context.context_value.set(
+        dash._utils.AttributeDict(triggered_inputs=[{"prop_id": prop_id}])
+    )
+    try:
+        yield
+    finally:
+        dash._callback_context.context_value.reset(token)
@@ -0,0 +1,360 @@
+"""Replays the callback traffic of users of the dashboard and reports the
+throughput and the latency of each callback.
+
+Each virtual user loads a tab, selects materials, drags the year slider,
+extracts the data and the python script and adds a property. Callbacks
+are chained like in the browser: the callbacks whose inputs were updated
+by a response are called next, and the clientside callback coalescing the
+filters is emulated.
+
+    python -m benchmarks.load_test --users 8 --iterations 5
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --users 32
+
+Without --url, the app is served by a local threaded werkzeug server.
+"""
+import argparse
+import concurrent.futures
+import json
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+import numpy as np
+
+FILTERS = ["material", "isotope", "author", "year"]
+
+# callbacks not called by default (the citations are fetched from Crossref)
+SKIPPED = ["graph_nb_citations_"]
+
+
+def stringify_id(component_id):
+    if isinstance(component_id, dict):
+        return json.dumps(component_id, sort_keys=True, separators=(",", ":"))
+    return component_id
+
+
+def parse_id(component_id):
+    if component_id.startswith("{"):
+        return json.loads(component_id)
+    return component_id
+
+
+def parse_outputs(output):
+    """Returns the (id, property) of the outputs of a callback"""
+    if output.startswith(".."):
+        keys = output[2:-2].split("...")
+    else:
+        keys = [output]
+    return [tuple(key.rsplit(".", 1)) for key in keys]
+
+
+def collect_values(node, values):
+    """Adds the properties of the components of a layout to values"""
+    if isinstance(node, list):
+        for child in node:
+            collect_values(child, values)
+    elif isinstance(node, dict) and "props" in node:
+        props = node["props"]
+        if "id" in props:
+            component_id = stringify_id(props["id"])
+            for prop, value in props.items():
+                if prop != "children":
+                    values[(component_id, prop)] = value
+        collect_values(props.get("children"), values)
+
+
+class Client:
+    """The state of the components in the browser of a virtual user"""
+
+    def __init__(self, url, dependencies, layout, skipped, stats):
+        self.url = url
+        self.dependencies = [
+            dependency
+            for dependency in dependencies
+            if not any(dependency["output"].strip(".").startswith(s) for s in skipped)
+        ]
+        self.values = {}
+        collect_values(layout, self.values)
+        self.stats = stats
+        self.client_id = uuid.uuid4().hex
+        self.sequence = 0
+
+    def post(self, dependency, changed):
+        """Calls a callback and updates the values with its response
+
+        Returns:
+            list: the (id, property) updated
+        """
+        payload = {
+            "output": dependency["output"],
+            "outputs": [
+                {"id": parse_id(component_id), "property": prop}
+                for component_id, prop in parse_outputs(dependency["output"])
+            ],
+            "changedPropIds": ["{}.{}".format(*key) for key in changed],
+        }
+        if len(payload["outputs"]) == 1:
+            payload["outputs"] = payload["outputs"][0]
+        for kind in ["inputs", "state"]:
+            payload[kind] = [
+                {
+                    "id": parse_id(item["id"]),
+                    "property": item["property"],
+                    "value": self.values.get((item["id"], item["property"])),
+                }
+                for item in dependency[kind]
+            ]
+
+        start = time.perf_counter()
+        body, error = self.send(payload)
+        if body and "cacheKey" in body:
+            # background callback: polled like in the browser until done
+            query = "?cacheKey={}&job={}".format(body["cacheKey"], body["job"])
+            while body is not None and "response" not in body and not error:
+                time.sleep(dependency["long"]["interval"] / 1000)
+                body, error = self.send(payload, query)
+        self.stats.add(dependency["output"], time.perf_counter() - start, error)
+
+        if not body:
+            return []
+        updated = []
+        for component_id, props in body["response"].items():
+            for prop, value in props.items():
+                # partial updates are not applied, the figures are only
+                # sent back as inputs
+                if isinstance(value, dict) and "__dash_patch_update" in value:
+                    continue
+                key = (stringify_id(component_id), prop)
+                self.values[key] = value
+                updated.append(key)
+        return updated
+
+    def send(self, payload, query=""):
+        """Posts a callback request
+
+        Returns:
+            dict, bool: the JSON response (None if empty) and if the request
+                failed
+        """
+        request = urllib.request.Request(
+            self.url + "/_dash-update-component" + query,
+            data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                body = response.read()
+        except urllib.error.HTTPError:
+            return None, True
+        return (json.loads(body) if body else None), False
+
+    def triggered(self, changed, sources=None):
+        """Returns the server callbacks with an input in changed. As in the
+        browser, a callback isn't triggered by its own outputs (sources maps
+        the changed values to the output of the callback which set them)"""
+        sources = sources or {}
+        return [
+            dependency
+            for dependency in self.dependencies
+            if dependency["clientside_function"] is None
+            and any(
+                (i["id"], i["property"]) in changed
+                and sources.get((i["id"], i["property"])) != dependency["output"]
+                for i in dependency["inputs"]
+            )
+        ]
+
+    def emulate_clientside(self, changed):
+        """Sets the filters_{group} stores of the changed filters"""
+        updated = []
+        for component_id, prop in changed:
+            for name in FILTERS:
+                prefix = f"{name}_filter_"
+                if component_id.startswith(prefix) and prop == "value":
+                    group = component_id[len(prefix) :]
+                    self.sequence += 1
+                    self.values[(f"filters_{group}", "data")] = {
+                        **{
+                            key: self.values.get((f"{key}_filter_{group}", "value"))
+                            for key in FILTERS
+                        },
+                        "client": self.client_id,
+                        "sequence": self.sequence,
+                    }
+                    updated.append((f"filters_{group}", "data"))
+        return list(set(updated))
+
+    def set(self, changes):
+        """Changes the values of components and calls the chain of
+        callbacks depending on them"""
+        changed = list(changes)
+        self.values.update(changes)
+        sources = {}
+        while changed:
+            changed = changed + self.emulate_clientside(changed)
+            updated, new_sources = [], {}
+            for dependency in self.triggered(changed, sources):
+                outputs = self.post(dependency, changed)
+                new_sources.update({key: dependency["output"] for key in outputs})
+                updated += outputs
+            changed, sources = updated, new_sources
+
+    def load_tab(self, group):
+        """Selects a tab and calls its initial callbacks"""
+        self.values[("tabs-example-graph", "active_tab")] = group
+        render = [d for d in self.dependencies if d["output"] == "tab_content.children"]
+        self.post(render[0], [("tabs-example-graph", "active_tab")])
+        content = self.values.pop(("tab_content", "children"))
+        new_values = {}
+        collect_values(content, new_values)
+        self.values.update(new_values)
+
+        initial = [
+            dependency
+            for dependency in self.dependencies
+            if dependency["clientside_function"] is None
+            and not dependency["prevent_initial_call"]
+            and any(
+                (i["id"], i["property"]) in new_values for i in dependency["inputs"]
+            )
+        ]
+        # callbacks depending on other initial callbacks wait for them
+        outputs = {key for d in initial for key in parse_outputs(d["output"])}
+        changed = []
+        for dependency in initial:
+            inputs = [(i["id"], i["property"]) for i in dependency["inputs"]]
+            if not any(key in outputs for key in inputs):
+                changed += self.post(dependency, [])
+        self.set({key: self.values[key] for key in changed})
+
+
+def run_scenario(client, group, drag_steps):
+    """Runs the actions of a user on a tab"""
+    client.load_tab(group)
+
+    # select two more materials one after the other
+    options = client.values.get((f"material_filter_{group}", "options")) or []
+    options = [option["value"] for option in options]
+    materials = list(client.values[(f"material_filter_{group}", "value")])
+    for material in [option for option in options if option not in materials][:2]:
+        materials = materials + [material]
+        client.set({(f"material_filter_{group}", "value"): materials})
+
+    # drag the lower bound of the year slider
+    year_min, year_max = client.values[(f"year_filter_{group}", "value")]
+    for year in np.linspace(year_min, year_max, num=drag_steps + 2)[1:-1]:
+        client.set({(f"year_filter_{group}", "value"): [int(year), year_max]})
+
+    # extract the data and the python script
+    client.set({(f"extract_button_{group}", "n_clicks"): 1})
+    client.set({(f"python_button_{group}", "n_clicks"): 1})
+
+    # add a property
+    client.values.update(
+        {
+            (f"new_{group}_pre_exp", "value"): 1e-7,
+            (f"new_{group}_act_energy", "value"): 0.2,
+            (f"new_{group}_author", "value"): "Loadtest",
+            (f"new_{group}_year", "value"): 2020,
+            (f"new_{group}_isotope", "value"): "H",
+            (f"new_{group}_material", "value"): "tungsten",
+        }
+    )
+    client.set({(f"submit_new_{group}", "n_clicks"): 1})
+
+
+class Stats:
+    """Latencies of the callbacks of all users"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self.lock = threading.Lock()
+
+    def add(self, output, latency, error):
+        with self.lock:
+            self.latencies.setdefault(output, []).append(latency)
+            self.errors[output] = self.errors.get(output, 0) + error
+
+    def report(self, duration):
+        lines = [
+            "{:<60} {:>7} {:>7} {:>9} {:>9} {:>9}".format(
+                "callback", "calls", "errors", "req/s", "p50 (ms)", "p99 (ms)"
+            )
+        ]
+        total = 0
+        for output, latencies in sorted(self.latencies.items()):
+            total += len(latencies)
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+            lines.append(
+                "{:<60} {:>7} {:>7} {:>9.1f} {:>9.1f} {:>9.1f}".format(
+                    output.strip(".")[:60],
+                    len(latencies),
+                    self.errors[output],
+                    len(latencies) / duration,
+                    p50,
+                    p99,
+                )
+            )
+        lines.append(
+            f"{total} requests in {duration:.1f} s: {total / duration:.1f} req/s"
+        )
+        return "\n".join(lines)
+
+
+def start_local_server():
+    """Serves the app in a background thread and returns its url"""
+    from werkzeug.serving import make_server
+
+    from app import app
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app.server, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def get_json(url):
+    with urllib.request.urlopen(url) as response:
+        return json.loads(response.read())
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--url", help="url of a running server")
+    parser.add_argument("--users", type=int, default=4, help="concurrent users")
+    parser.add_argument("--iterations", type=int, default=3, help="runs per user")
+    parser.add_argument("--groups", default="diffusivity,solubility")
+    parser.add_argument("--drag-steps", type=int, default=5)
+    parser.add_argument(
+        "--with-citations",
+        action="store_true",
+        help="also call the citations callbacks (requests to Crossref)",
+    )
+    args = parser.parse_args(args)
+
+    url = (args.url or start_local_server()).rstrip("/")
+    dependencies = get_json(url + "/_dash-dependencies")
+    layout = get_json(url + "/_dash-layout")
+    groups = args.groups.split(",")
+    skipped = [] if args.with_citations else SKIPPED
+    stats = Stats()
+
+    def run_user(user):
+        client = Client(url, dependencies, layout, skipped, stats)
+        for iteration in range(args.iterations):
+            run_scenario(
+                client, groups[(user + iteration) % len(groups)], args.drag_steps
+            )
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(args.users) as executor:
+        list(executor.map(run_user, range(args.users)))
+    print(stats.report(time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+from htm_dashboard import callbacks
+from htm_dashboard.debounce import make_filters
+
+from .conftest import measure, payload_size, triggered
+
+
+def filter_args(filters):
+    return [filters[key] for key in ["materials", "isotopes", "authors", "years"]]
+
+
+def update_graph(group, filters, prop_id, colour_by="property", figure=None):
+    update = callbacks.create_update_graph_function(group)
+    with triggered(prop_id):
+        return update(
+            make_filters(*filter_args(filters)), 1, colour_by, "none", True, figure
+        )
+
+
+def test_update_graph(benchmark, group, filters):
+    figure = measure(benchmark, update_graph, group, filters, f"filters_{group}.data")
+    benchmark.extra_info["payload_size"] = payload_size(figure)
+
+
+def test_update_graph_colour_by(benchmark, group, filters):
+    figure = update_graph(group, filters, f"filters_{group}.data").to_plotly_json()
+    patch = measure(
+        benchmark,
+        update_graph,
+        group,
+        filters,
+        f"colour-by_{group}.value",
+        colour_by="author",
+        figure=figure,
+    )
+    benchmark.extra_info["payload_size"] = payload_size(patch)
+
+
+def test_update_graph_mean(benchmark, group, filters):
+    figure = update_graph(group, filters, f"filters_{group}.data").to_plotly_json()
+    patch = measure(
+        benchmark,
+        update_graph,
+        group,
+        filters,
+        f"mean_button_{group}.n_clicks",
+        figure=figure,
+    )
+    benchmark.extra_info["payload_size"] = payload_size(patch)
+
+
+def test_update_entries_per_year_graph(benchmark, group, filters):
+    update = callbacks.create_update_entries_per_year_graph_function(group)
+    figure = measure(benchmark, update, None, *filter_args(filters))
+    benchmark.extra_info["payload_size"] = payload_size(figure)
+
+
+def test_update_piechart_material(benchmark, group, filters):
+    update = callbacks.create_update_piechart_material_function(group)
+    figure = measure(benchmark, update, None, *filter_args(filters))
+    benchmark.extra_info["payload_size"] = payload_size(figure)
+
+
+def test_update_table_data(benchmark, group, filters):
+    update = callbacks.create_update_table_data_function(group)
+    data = measure(benchmark, update, None, *filter_args(filters))
+    benchmark.extra_info["payload_size"] = payload_size(data)
@@ -0,0 +1,16 @@
+from htm_dashboard.export import create_data_as_dict, create_data_as_npz
+
+from .conftest import measure, payload_size
+from .test_graph import filter_group
+
+
+def test_create_data_as_dict(benchmark, group, filters):
+    properties = filter_group(group, filters)
+    data = measure(benchmark, create_data_as_dict, properties)
+    benchmark.extra_info["payload_size"] = payload_size(data)
+
+
+def test_create_data_as_npz(benchmark, group, filters):
+    properties = filter_group(group, filters)
+    data = measure(benchmark, create_data_as_npz, properties)
+    benchmark.extra_info["payload_size"] = len(data)
@@ -0,0 +1,32 @@
+from htm_dashboard import statistics
+from htm_dashboard.graph import make_group_of_properties, make_graph
+
+from .conftest import measure, payload_size
+
+
+def filter_group(group, filters):
+    return make_group_of_properties(
+        type_of_prop=group,
+        materials=filters["materials"],
+        authors=filters["authors"],
+        isotopes=filters["isotopes"],
+        years=filters["years"],
+    )
+
+
+def test_make_group_of_properties(benchmark, group, filters):
+    properties = measure(benchmark, filter_group, group, filters)
+    benchmark.extra_info["nb_properties"] = len(properties)
+
+
+def test_make_graph(benchmark, group, filters):
+    properties = filter_group(group, filters)
+    figure = measure(benchmark, make_graph, properties)
+    benchmark.extra_info["nb_properties"] = len(properties)
+    benchmark.extra_info["payload_size"] = payload_size(figure)
+
+
+def test_refit(benchmark, group, filters):
+    arrays = statistics.to_arrays(filter_group(group, filters))
+    measure(benchmark, statistics.refit, arrays)
+    benchmark.extra_info["nb_points"] = len(arrays["data_T"])
@@ -0,0 +1,327 @@
+import hashlib
+import hmac
+import json
+import os
+
+import flask
+import h_transport_materials as htm
+import numpy as np
+
+from . import dataset
+from .bulk_import import read_table, import_table
+from .graph import make_group_of_properties
+from .groups import type_to_database
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+api = flask.Blueprint("api", __name__, url_prefix="/api")
+
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+
+# POST /api/<group>/import is disabled if not set, requests must have a
+# X-HTM-Import-Token header equal to this token
+IMPORT_TOKEN = os.environ.get("HTM_DASHBOARD_IMPORT_TOKEN")
+# maximum size in bytes of the body of an import request
+IMPORT_MAX_BYTES = int(os.environ.get("HTM_DASHBOARD_IMPORT_MAX_BYTES", 10_000_000))
+
+IMPORT_HEADER = "X-HTM-Import-Token"
+
+
+@api.route("/<group>", methods=["GET"])
+def query_properties(group):
+    """Returns the properties of a group matching the query as columns.
+
+    Query parameters (all optional, lists can be repeated or comma separated):
+        material, isotope, author: values to keep
+        year_min, year_max: range of years of publication
+        format: "json" (default) or "arrow" for an Arrow IPC stream
+    """
+    if group not in type_to_database:
+        flask.abort(404, f"unknown group {group}")
+
+    arrow = flask.request.args.get(
+        "format"
+    ) == "arrow" or ARROW_MIMETYPE in flask.request.headers.get("Accept", "")
+    if arrow and pa is None:
+        flask.abort(406, "pyarrow is required for the arrow format")
+
+    # the format is part of the ETag: the same query can return JSON or
+    # Arrow depending on the Accept header
+    etag = make_etag(group, flask.request.args, "arrow" if arrow else "json")
+    cached = not_modified(etag)
+    if cached is not None:
+        cached.vary.add("Accept")
+        return cached
+
+    try:
+        properties_group = make_group_of_properties(
+            type_of_prop=group, **parse_filters(group, flask.request.args)
+        )
+    except ValueError as error:
+        flask.abort(400, str(error))
+    columns = dataset.to_columns(properties_group)
+
+    if arrow:
+        table = pa.table(columns)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        body = sink.getvalue().to_pybytes()
+        mimetype = ARROW_MIMETYPE
+    else:
+        body = json.dumps(
+            {"group": group, "count": len(properties_group), "columns": columns}
+        ).encode()
+        mimetype = "application/json"
+
+    response = make_response(body, mimetype, etag)
+    response.vary.add("Accept")
+    return response
+
+
+@api.route("/<group>/envelope", methods=["GET"])
+def query_envelope(group):
+    """Returns percentiles of the properties of a group matching the query
+    on a temperature grid.
+
+    Query parameters (all optional):
+        material, isotope, author, year_min, year_max: see query_properties
+        percentile: the percentiles to compute (default 10,50,90)
+        T_min, T_max: temperature range in K (default: range of the properties)
+        nb_points: number of temperatures (default 200, max 10000)
+    """
+    if group not in type_to_database:
+        flask.abort(404, f"unknown group {group}")
+
+    etag = make_etag(group, flask.request.args)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    args = flask.request.args
+    try:
+        filters = parse_filters(group, args)
+        percentiles = [
+            float(val) for val in ",".join(args.getlist("percentile")).split(",") if val
+        ] or [10, 50, 90]
+        T_min = float(args["T_min"]) if "T_min" in args else None
+        T_max = float(args["T_max"]) if "T_max" in args else None
+        nb_points = int(args.get("nb_points", 200))
+    except ValueError as error:
+        flask.abort(400, str(error))
+    if not all(0 <= percentile <= 100 for percentile in percentiles):
+        flask.abort(400, "percentiles must be between 0 and 100")
+    if not 2 <= nb_points <= 10000:
+        flask.abort(400, "nb_points must be between 2 and 10000")
+    for T in [T_min, T_max]:
+        if T is not None and not 0 < T < np.inf:
+            flask.abort(400, "T_min and T_max must be positive and finite")
+    if T_min is not None and T_max is not None and T_min >= T_max:
+        flask.abort(400, "T_min must be lower than T_max")
+
+    envelope = dataset.envelope(
+        group,
+        filters["materials"],
+        filters["authors"],
+        filters["isotopes"],
+        filters["years"],
+        percentiles=percentiles,
+        T_min=T_min,
+        T_max=T_max,
+        nb_points=nb_points,
+    )
+    body = json.dumps(
+        {
+            "group": group,
+            "T": envelope["T"].tolist(),
+            "count": envelope["count"].tolist(),
+            "values": {
+                f"{percentile:g}": to_json_list(values)
+                for percentile, values in zip(percentiles, envelope["values"])
+            },
+        }
+    ).encode()
+    return make_response(body, "application/json", etag)
+
+
+@api.route("/<group>/ranking", methods=["GET"])
+def query_ranking(group):
+    """Ranks the properties of a group matching the query by their value at
+    one or several temperatures.
+
+    Query parameters:
+        T: the temperatures in K (required)
+        material, isotope, author, year_min, year_max: see query_properties
+        order: "asc" (default, lowest values first) or "desc"
+        in_range: 1 to only keep the properties whose range contains T
+        page: the page, starting at 1 (default 1)
+        page_size: properties per page (default 50, max 1000)
+    """
+    if group not in type_to_database:
+        flask.abort(404, f"unknown group {group}")
+
+    etag = make_etag(group, flask.request.args)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    args = flask.request.args
+    try:
+        filters = parse_filters(group, args)
+        temperatures = [
+            float(val) for val in ",".join(args.getlist("T")).split(",") if val
+        ]
+        page = int(args.get("page", 1))
+        page_size = int(args.get("page_size", 50))
+    except ValueError as error:
+        flask.abort(400, str(error))
+    if not temperatures or not all(0 < T < np.inf for T in temperatures):
+        flask.abort(400, "T must be given, positive and finite")
+    if args.get("order", "asc") not in ["asc", "desc"]:
+        flask.abort(400, "order must be asc or desc")
+    if page < 1 or not 1 <= page_size <= 1000:
+        flask.abort(400, "page must be positive and page_size between 1 and 1000")
+
+    rankings = []
+    for T in temperatures:
+        ranking = dataset.ranking(
+            group,
+            filters["materials"],
+            filters["authors"],
+            filters["isotopes"],
+            filters["years"],
+            T,
+        )
+        rows, count = dataset.ranking_page(
+            ranking,
+            page - 1,
+            page_size,
+            descending=args.get("order") == "desc",
+            in_range_only=args.get("in_range") == "1",
+        )
+        rankings.append({"T": T, "count": count, "properties": rows})
+
+    body = json.dumps(
+        {"group": group, "page": page, "page_size": page_size, "rankings": rankings}
+    ).encode()
+    return make_response(body, "application/json", etag)
+
+
+def to_json_list(array):
+    """Converts an array to a list where nan values are replaced by None"""
+    return [None if np.isnan(val) else val for val in array.tolist()]
+
+
+def parse_filters(group, args):
+    """Converts query parameters to make_group_of_properties arguments.
+    Missing filters select everything.
+
+    Args:
+        group (str): a group of GROUPS
+        args (werkzeug.datastructures.MultiDict): the query parameters
+
+    Raises:
+        ValueError: if year_min or year_max are not integers
+
+    Returns:
+        dict: materials, authors, isotopes and years
+    """
+
+    def get_list(key):
+        values = []
+        for value in args.getlist(key):
+            values += [val.strip() for val in value.split(",") if val.strip()]
+        return values
+
+    materials = [mat.lower() for mat in get_list("material")]
+    authors = get_list("author")
+    isotopes = [iso.upper() for iso in get_list("isotope")]
+
+    years = None
+    if "year_min" in args or "year_max" in args:
+        all_years = [prop.year for prop in type_to_database[group]] or [0]
+        years = [
+            int(args.get("year_min", min(all_years))),
+            int(args.get("year_max", max(all_years))),
+        ]
+
+    return dict(
+        materials=materials or dataset.material_options(group),
+        authors=authors or dataset.author_options(group),
+        isotopes=isotopes or ["H", "D", "T"],
+        years=years,
+    )
+
+
+def make_etag(group, args, response_format="json"):
+    """The ETag only depends on the query, on the format of the response and
+    on the version of the data"""
+    key = json.dumps(
+        [
+            getattr(htm, "__version__", None),
+            flask.request.path,
+            dataset.versions[group],
+            sorted(args.items(multi=True)),
+            response_format,
+        ]
+    )
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def not_modified(etag):
+    """Returns a 304 response if the If-None-Match header of the request
+    matches an ETag, None otherwise. Flask-Compress suffixes the ETags of
+    compressed responses with the algorithm (ex: "<etag>:br"), so the
+    suffix is ignored and the matching tag is sent back."""
+    for tag in flask.request.if_none_match.as_set():
+        if tag.split(":")[0] == etag:
+            return flask.Response(status=304, headers={"ETag": f'"{tag}"'})
+    return None
+
+
+def make_response(body: bytes, mimetype: str, etag: str):
+    """Makes a response with an ETag, compressed by Flask-Compress (see
+    server.configure_server)"""
+    response = flask.Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    return response
+
+
+@api.route("/<group>/import", methods=["POST"])
+def import_properties(group):
+    """Adds a CSV or JSON table of properties to a group.
+
+    The table is either sent as a multipart file named "file" or as the
+    raw request body (JSON if the Content-Type is application/json, CSV
+    otherwise). The request must have a X-HTM-Import-Token header equal to
+    IMPORT_TOKEN and a body smaller than IMPORT_MAX_BYTES.
+    """
+    token = flask.request.headers.get(IMPORT_HEADER, "")
+    if IMPORT_TOKEN is None or not hmac.compare_digest(token, IMPORT_TOKEN):
+        flask.abort(403, "importing requires a valid import token")
+    if group not in type_to_database:
+        flask.abort(404, f"unknown group {group}")
+    if flask.request.content_length is None:
+        flask.abort(411, "the request must have a Content-Length")
+    if flask.request.content_length > IMPORT_MAX_BYTES:
+        flask.abort(413, f"the table must be smaller than {IMPORT_MAX_BYTES} bytes")
+
+    if "file" in flask.request.files:
+        upload = flask.request.files["file"]
+        raw, filename = upload.read(), upload.filename or ""
+    elif flask.request.is_json:
+        raw, filename = flask.request.get_data(), "upload.json"
+    else:
+        raw, filename = flask.request.get_data(), "upload.csv"
+
+    try:
+        table = read_table(raw, filename)
+    except ValueError as error:
+        return flask.jsonify(added=0, errors=[{"row": None, "error": str(error)}]), 400
+
+    nb_added, errors = import_table(table, group)
+    return flask.jsonify(added=nb_added, errors=errors)
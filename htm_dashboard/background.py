@@ -0,0 +1,115 @@
+import functools
+import logging
+import os
+import tempfile
+import uuid
+
+import dash
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+logger = logging.getLogger(__name__)
+
+# directory of the job queue of the background callbacks, set to "" to run
+# them in the request workers
+BACKGROUND_DIR = os.environ.get(
+    "HTM_DASHBOARD_BACKGROUND_DIR",
+    os.path.join(tempfile.gettempdir(), "htm_dashboard_jobs"),
+)
+# seconds the results of the jobs are kept on disk
+BACKGROUND_EXPIRE = int(os.environ.get("HTM_DASHBOARD_BACKGROUND_EXPIRE", 600))
+
+
+def make_manager():
+    """Makes the manager running the background callbacks in subprocesses
+
+    Returns:
+        dash.DiskcacheManager: the manager, None if BACKGROUND_DIR is empty
+            or if dash[diskcache] isn't installed
+    """
+    if not BACKGROUND_DIR:
+        return None
+    if diskcache is None:
+        logger.warning(
+            "diskcache isn't installed (pip install dash[diskcache]), the "
+            "exports run in the request workers"
+        )
+        return None
+    try:
+        return dash.DiskcacheManager(
+            diskcache.Cache(BACKGROUND_DIR),
+            # jobs are never shared: the callbacks of the groups have the
+            # same source code and can get the same arguments
+            cache_by=[lambda: uuid.uuid4().hex],
+            expire=BACKGROUND_EXPIRE,
+        )
+    except ImportError as error:
+        # psutil or multiprocess is missing
+        logger.warning(
+            "%s (pip install dash[diskcache]), the exports run in the "
+            "request workers",
+            error,
+        )
+        return None
+
+
+MANAGER = make_manager()
+# the cache of the manager, the jobs push their metrics to it (see metrics.py)
+QUEUE = MANAGER.handle if MANAGER is not None else None
+
+
+def callback_options(group: str):
+    """Returns the options of app.callback running a download callback of a
+    group in the background: the download buttons are disabled, the
+    progress bar and the cancel button are shown while it runs
+
+    Args:
+        group (str): a group of GROUPS
+
+    Returns:
+        dict: the keyword arguments of app.callback, empty if the
+            background callbacks are disabled
+    """
+    if MANAGER is None:
+        return {}
+    return dict(
+        background=True,
+        running=[
+            (dash.Output(f"extract_button_{group}", "disabled"), True, False),
+            (dash.Output(f"python_button_{group}", "disabled"), True, False),
+            (
+                dash.Output(f"download_status_{group}", "style"),
+                {"display": "flex"},
+                {"display": "none"},
+            ),
+        ],
+        progress=[
+            dash.Output(f"download_progress_{group}", "value"),
+            dash.Output(f"download_progress_{group}", "label"),
+        ],
+        progress_default=[0, ""],
+        cancel=[dash.Input(f"cancel_download_{group}", "n_clicks")],
+    )
+
+
+def adapt(function):
+    """Adapts a callback taking a set_progress function as first argument
+    to run in the request worker if the background callbacks are disabled
+
+    Args:
+        function (callable): the callback
+
+    Returns:
+        callable: the callback
+    """
+    if MANAGER is not None:
+        return function
+
+    @functools.wraps(function)
+    def synchronous(*args):
+        return function(lambda progress: None, *args)
+
+    return synchronous
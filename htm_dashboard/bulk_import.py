@@ -0,0 +1,196 @@
+import base64
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import dataset
+from .groups import GROUPS
+
+
+REQUIRED_COLUMNS = ["material", "isotope", "author", "year", "pre_exp", "act_energy"]
+OPTIONAL_COLUMNS = ["range_low", "range_high", "units"]
+
+DEFAULT_RANGE = (300, 1200)
+
+# maximum number of rows of an imported table
+MAX_ROWS = int(os.environ.get("HTM_DASHBOARD_IMPORT_MAX_ROWS", 10000))
+
+
+def read_upload(contents: str, filename: str):
+    """Decodes the contents of a dcc.Upload component
+
+    Args:
+        contents (str): base64 encoded contents ("data:<type>;base64,<data>")
+        filename (str): name of the uploaded file, used to detect the format
+
+    Returns:
+        pd.DataFrame: the table of new properties
+    """
+    _, content_string = contents.split(",", 1)
+    return read_table(base64.b64decode(content_string), filename)
+
+
+def read_table(raw: bytes, filename: str):
+    """Reads a CSV or JSON table of properties
+
+    Args:
+        raw (bytes): the content of the file
+        filename (str): name of the file, JSON is assumed if it ends
+            with ".json", CSV otherwise
+
+    Raises:
+        ValueError: if the file can't be parsed, if it has more than MAX_ROWS
+            rows or if two columns have the same name (ignoring case)
+
+    Returns:
+        pd.DataFrame: the table of new properties
+    """
+    if filename.lower().endswith(".json"):
+        table = pd.read_json(io.BytesIO(raw), orient="records", dtype=False)
+    else:
+        # nrows stops the parsing after MAX_ROWS + 1 rows
+        table = pd.read_csv(io.BytesIO(raw), nrows=MAX_ROWS + 1)
+        # pandas renames repeated names of the header ("a", "a.1")
+        header = pd.read_csv(io.BytesIO(raw), header=None, nrows=1).iloc[0]
+        table.columns = list(header)
+    if len(table) > MAX_ROWS:
+        raise ValueError(f"too many rows (maximum {MAX_ROWS})")
+
+    columns = [str(col).strip().lower() for col in table.columns]
+    duplicates = sorted({col for col in columns if columns.count(col) > 1})
+    if duplicates:
+        raise ValueError("duplicate columns: {}".format(", ".join(duplicates)))
+    table.columns = columns
+    return table
+
+
+def validate(table: pd.DataFrame, group: str):
+    """Checks all the rows of a table at once
+
+    Args:
+        table (pd.DataFrame): the table of new properties
+        group (str): a group of GROUPS
+
+    Returns:
+        pd.DataFrame, list: the cleaned valid rows and the list of errors
+            as dicts {"row": <1-based row number>, "error": <message>}
+    """
+    missing = [col for col in REQUIRED_COLUMNS if col not in table.columns]
+    if missing:
+        return table.iloc[0:0], [
+            {"row": None, "error": "missing columns: {}".format(", ".join(missing))}
+        ]
+
+    table = table.reset_index(drop=True)
+    clean = pd.DataFrame(index=table.index)
+    for col in ["material", "author"]:
+        clean[col] = table[col].fillna("").astype(str).str.strip()
+    clean["isotope"] = table["isotope"].fillna("").astype(str).str.strip().str.upper()
+    for col in ["pre_exp", "act_energy", "year", "range_low", "range_high"]:
+        if col in table.columns:
+            clean[col] = pd.to_numeric(table[col], errors="coerce")
+        else:
+            clean[col] = np.nan
+    accepted_units = GROUPS[group].get("units_options")
+    if accepted_units is None:
+        clean["units"] = None
+    elif "units" in table.columns:
+        clean["units"] = table["units"].fillna(accepted_units[0]).astype(str)
+    else:
+        clean["units"] = accepted_units[0]
+
+    no_range = clean["range_low"].isna() & clean["range_high"].isna()
+    clean.loc[no_range, "range_low"] = DEFAULT_RANGE[0]
+    clean.loc[no_range, "range_high"] = DEFAULT_RANGE[1]
+
+    checks = [
+        (clean["material"] == "", "material is empty"),
+        (clean["author"] == "", "author is empty"),
+        (~clean["isotope"].isin(["H", "D", "T"]), "isotope must be H, D or T"),
+        (
+            ~(clean["pre_exp"] > 0) | ~np.isfinite(clean["pre_exp"]),
+            "pre_exp must be a positive number",
+        ),
+        (~np.isfinite(clean["act_energy"]), "act_energy must be a number"),
+        (
+            clean["year"].isna() | (clean["year"] % 1 != 0),
+            "year must be an integer",
+        ),
+        (
+            clean["range_low"].isna()
+            | clean["range_high"].isna()
+            | ~(clean["range_low"] > 0)
+            | ~(clean["range_low"] < clean["range_high"]),
+            "range must satisfy 0 < range_low < range_high",
+        ),
+    ]
+    if accepted_units is not None:
+        checks.append(
+            (
+                ~clean["units"].isin(accepted_units),
+                "units must be {} or {}".format(*accepted_units),
+            )
+        )
+
+    invalid = np.zeros(len(clean), dtype=bool)
+    errors = []
+    for mask, message in checks:
+        mask = mask.to_numpy()
+        invalid |= mask
+        errors += [{"row": int(i) + 1, "error": message} for i in np.flatnonzero(mask)]
+    errors.sort(key=lambda error: error["row"])
+
+    valid = clean[~invalid]
+    valid = valid.assign(year=valid["year"].astype(int))
+    return valid, errors
+
+
+def import_table(table: pd.DataFrame, group: str):
+    """Validates a table of properties and adds the valid ones to the
+    database in a single batch
+
+    Args:
+        table (pd.DataFrame): the table of new properties
+        group (str): a group of GROUPS
+
+    Returns:
+        int, list: the number of properties added and the list of errors
+    """
+    valid, errors = validate(table, group)
+    new_properties = [
+        dataset.make_property(
+            group,
+            pre_exp=row.pre_exp,
+            act_energy=row.act_energy,
+            author=row.author,
+            year=row.year,
+            isotope=row.isotope,
+            material=row.material,
+            range=(row.range_low, row.range_high),
+            units=row.units,
+        )
+        for row in valid.itertuples(index=False)
+    ]
+    dataset.add_properties(group, new_properties)
+    return len(new_properties), errors
+
+
+def make_report(nb_added: int, errors: list):
+    """Summarises the result of an import in one line per error
+
+    Args:
+        nb_added (int): number of properties added
+        errors (list): the list of errors returned by import_table
+
+    Returns:
+        list: the lines of the report
+    """
+    lines = [f"{nb_added} properties added."]
+    for error in errors:
+        if error["row"] is None:
+            lines.append(error["error"])
+        else:
+            lines.append("row {}: {}".format(error["row"], error["error"]))
+    return lines
@@ -1,10 +1,16 @@
-import numpy as np
 import dash
+from dash import dcc, html
+import numpy as np
 import plotly.io as pio
 
-from .export import create_data_as_dict, generate_python_code
+from . import dataset, statistics
+from .bulk_import import read_upload, import_table, make_report
+
+from .export import create_data_as_dict, create_data_as_npz, generate_python_code
 
-from .tab import materials_options, TABLE_KEYS
+from .debounce import is_stale, unpack
+from .groups import GROUPS
+from .tab import materials_options, TABLE_KEYS, TAB_STATE_PROPS, make_tab_content
 
 from .graph import (
     make_group_of_properties,
@@ -13,20 +19,41 @@ from .graph import (
     make_graph,
     make_piechart_materials,
     add_mean_value,
+    make_mean_traces,
+    make_envelope_traces,
+    list_of_colours,
+    make_data_traces,
+    DATA_LEGENDGROUP,
+    MEAN_LEGENDGROUP,
+    ENVELOPE_LEGENDGROUP,
     make_figure_prop_per_year,
     make_citations_graph,
+    make_discrepancy_graph,
+    make_message_graph,
+    MAX_DISCREPANCY_PROPERTIES,
     TEMPLATE_DARK,
     TEMPLATE_LIGHT,
 )
 
-import h_transport_materials as htm
+
+def render_tab(active_tab, *states):
+    """Renders the content of the selected tab from its saved state
+
+    Args:
+        active_tab (str): the selected group
+        states (dict): the states of the tabs in the order of GROUPS
+
+    Returns:
+        html.Div: the content of the tab
+    """
+    return make_tab_content(active_tab, dict(zip(GROUPS, states))[active_tab])
 
 
-type_to_database = {
-    "diffusivity": htm.diffusivities,
-    "solubility": htm.solubilities,
-    "recombination_coeff": htm.recombination_coeffs,
-}
+def create_save_tab_state_function(group):
+    def save_tab_state(*values):
+        return dict(zip(TAB_STATE_PROPS, values))
+
+    return save_tab_state
 
 
 def create_make_citations_figure_function(group):
@@ -65,15 +92,29 @@ def create_add_all_authors_function(group):
     def add_all_authors(n_clicks):
 
         if n_clicks:
-            return np.unique(
-                [prop.author.capitalize() for prop in type_to_database[group]]
-            ).tolist()
+            return dataset.author_options(group)
         else:
             return dash.no_update
 
     return add_all_authors
 
 
+def create_search_materials_function(group):
+    def search_materials(search_value, material_filter):
+        return dataset.search_options(group, "material", search_value, material_filter)
+
+    return search_materials
+
+
+def create_search_authors_function(group):
+    def search_authors(search_value, material_filter, author_filter):
+        return dataset.search_options(
+            group, "author", search_value, author_filter, materials=material_filter
+        )
+
+    return search_authors
+
+
 def create_update_entries_per_year_graph_function(group):
     def update_entries_per_year_graph(
         figure, material_filter, isotope_filter, author_filter, year_filter
@@ -94,14 +135,17 @@ def create_update_entries_per_year_graph_function(group):
 
 def create_update_graph_function(group):
     def update_graph(
-        material_filter,
-        isotope_filter,
-        author_filter,
-        year_filter,
+        filters,
         mean_button,
         colour_by,
+        envelope,
         toggle_light,
+        current_figure,
     ):
+        # newer filters were sent while this request was queued
+        if is_stale(group, filters):
+            return dash.no_update
+        material_filter, isotope_filter, author_filter, year_filter = unpack(filters)
 
         properties_group = make_group_of_properties(
             type_of_prop=group,
@@ -110,6 +154,42 @@ def create_update_graph_function(group):
             isotopes=isotope_filter,
             years=year_filter,
         )
+        filter_values = (material_filter, author_filter, isotope_filter, year_filter)
+
+        def make_envelope():
+            if envelope == "none" or len(properties_group) == 0:
+                return []
+            percentiles = [float(p) for p in envelope.split(",")]
+            return make_envelope_traces(
+                dataset.envelope(group, *filter_values, percentiles=percentiles)
+            )
+
+        changed_id = [p["prop_id"] for p in dash.callback_context.triggered][0]
+
+        # the filters haven't changed: add the new traces to the current
+        # figure instead of rebuilding it
+        if changed_id == f"mean_button_{group}.n_clicks":
+            if len(properties_group) == 0:
+                return dash.no_update
+            mean = dataset.mean_curve(group, *filter_values)
+            if current_figure is not None:
+                return patch_traces(
+                    current_figure,
+                    MEAN_LEGENDGROUP,
+                    make_mean_traces(properties_group, mean),
+                )
+        elif changed_id == f"envelope_{group}.value" and current_figure is not None:
+            return patch_traces(current_figure, ENVELOPE_LEGENDGROUP, make_envelope())
+        elif changed_id == f"colour-by_{group}.value" and current_figure is not None:
+            colour_list = list_of_colours(properties_group, colour_by)
+            patch = patch_colours(current_figure, colour_list)
+            if patch is not None:
+                return patch_traces(
+                    current_figure,
+                    DATA_LEGENDGROUP,
+                    make_data_traces(properties_group, colour_list),
+                    patch,
+                )
 
         if toggle_light:
             pio.templates.default = TEMPLATE_LIGHT
@@ -117,17 +197,70 @@ def create_update_graph_function(group):
             pio.templates.default = TEMPLATE_DARK
 
         figure = make_graph(properties_group, colour_by)
-        changed_id = [p["prop_id"] for p in dash.callback_context.triggered][0]
+        figure.add_traces(make_envelope())
         if changed_id == f"mean_button_{group}.n_clicks":
-            add_mean_value(properties_group, figure)
+            add_mean_value(properties_group, figure, mean)
 
         return figure
 
     return update_graph
 
 
+def patch_traces(figure: dict, legendgroup: str, new_traces: list, patch=None):
+    """Makes a partial update of a figure replacing the traces of a legend
+    group
+
+    Args:
+        figure (dict): the current figure as sent by Dash
+        legendgroup (str): the legend group of the traces to replace
+        new_traces (list): the new go traces
+        patch (dash.Patch, optional): an update to complete. Defaults to
+            None (new update).
+
+    Returns:
+        dash.Patch: the update
+    """
+    if patch is None:
+        patch = dash.Patch()
+    indices = [
+        i
+        for i, trace in enumerate(figure["data"])
+        if trace.get("legendgroup") == legendgroup
+    ]
+    # delete from the end so that the other indices don't shift
+    for i in reversed(indices):
+        del patch["data"][i]
+    patch["data"].extend([trace.to_plotly_json() for trace in new_traces])
+    return patch
+
+
+def patch_colours(figure: dict, colour_list: list):
+    """Makes a partial update of a figure changing only the colours of the
+    lines of the properties
+
+    Args:
+        figure (dict): the current figure as sent by Dash
+        colour_list (list): the colours of the properties
+            (see list_of_colours)
+
+    Returns:
+        dash.Patch: the update, None if the lines of the figure don't
+            match the colours
+    """
+    indices = [
+        i for i, trace in enumerate(figure["data"]) if "legendgroup" not in trace
+    ]
+    if len(indices) != len(colour_list):
+        return None
+    patch = dash.Patch()
+    for i, colour in zip(indices, colour_list):
+        patch["data"][i]["line"]["color"] = colour
+    return patch
+
+
 def create_make_download_data_function(group):
     def make_download_data(
+        set_progress,
         n_clicks,
         material_filter,
         isotope_filter,
@@ -145,7 +278,12 @@ def create_make_download_data_function(group):
                 years=year_filter,
             )
             return dict(
-                content=create_data_as_dict(properties_group),
+                content=create_data_as_dict(
+                    properties_group,
+                    progress=lambda i, total: set_progress(
+                        (100 * i / total, f"{i}/{total} properties")
+                    ),
+                ),
                 filename="data.json",
             )
 
@@ -154,6 +292,7 @@ def create_make_download_data_function(group):
 
 def make_download_python_callback(group):
     def download_python(
+        set_progress,
         n_clicks,
         material_filter,
         isotope_filter,
@@ -162,18 +301,36 @@ def make_download_python_callback(group):
     ):
         changed_id = [p["prop_id"] for p in dash.callback_context.triggered][0]
         if changed_id == f"python_button_{group}.n_clicks":
-
-            return dict(
-                content=generate_python_code(
-                    materials=material_filter,
-                    isotopes=isotope_filter,
-                    authors=author_filter,
-                    yearmin=year_filter[0],
-                    yearmax=year_filter[1],
-                    group=group,
+            set_progress((0, "filtering"))
+            properties_group = make_group_of_properties(
+                type_of_prop=group,
+                materials=material_filter,
+                authors=author_filter,
+                isotopes=isotope_filter,
+                years=year_filter,
+            )
+            filters = dict(
+                materials=material_filter,
+                isotopes=isotope_filter,
+                authors=author_filter,
+                yearmin=year_filter[0],
+                yearmax=year_filter[1],
+            )
+            filename = f"{group}.npz"
+            set_progress((50, "exporting"))
+            return (
+                dict(
+                    content=generate_python_code(
+                        **filters, group=group, filename=filename
+                    ),
+                    filename="script.py",
+                ),
+                dcc.send_bytes(
+                    create_data_as_npz(properties_group, dict(group=group, **filters)),
+                    filename,
                 ),
-                filename="script.py",
             )
+        return dash.no_update, dash.no_update
 
     return download_python
 
@@ -209,7 +366,7 @@ def make_toggle_modal_function(group):
 def make_add_property(group):
     def add_property(
         n_clicks,
-        material_filter,
+        upload_contents,
         new_pre_exp,
         new_act_energy,
         new_author,
@@ -218,7 +375,14 @@ def make_add_property(group):
         new_material,
         new_range_low,
         new_range_high,
+        upload_filename,
+        material_filter,
+        author_filter,
+        material_search,
+        author_search,
     ):
+        error_message = ""
+        import_report = dash.no_update
         changed_id = [p["prop_id"] for p in dash.callback_context.triggered][0]
         if changed_id == f"submit_new_{group}.n_clicks":
             if None in [
@@ -229,47 +393,41 @@ def make_add_property(group):
                 new_isotope,
                 new_material,
             ]:
-                return dash.no_update, dash.no_update, "Error!"
+                return "Error!", dash.no_update, dash.no_update, dash.no_update
             if (new_range_low, new_range_high) == (None, None):
                 (new_range_low, new_range_high) = (300, 1200)
 
-            if group == "diffusivity":
-                new_property = htm.Diffusivity(
-                    D_0=new_pre_exp,
-                    E_D=new_act_energy,
-                )
-            elif group == "solubility":
-                new_property = htm.Solubility(
-                    units="m-3 Pa-1/2",  # TODO expose this (see #68)
-                    S_0=new_pre_exp,
-                    E_S=new_act_energy,
-                )
-            elif group == "recombination_coeff":
-                new_property = htm.RecombinationCoeff(
-                    pre_exp=new_pre_exp,
-                    act_energy=new_act_energy,
-                )
-
-            new_property.author = new_author.lower()
-            new_property.year = new_year
-            new_property.isotope = new_isotope
-            new_property.material = new_material
-            new_property.range = (new_range_low, new_range_high)
-
-            type_to_database[group].append(new_property)
-
-        all_authors = np.unique(
-            [
-                prop.author.capitalize()
-                for prop in type_to_database[group]
-                if prop.material in material_filter
-            ]
-        ).tolist()
-        all_materials = np.unique(
-            [prop.material.lower() for prop in type_to_database[group]]
-        ).tolist()
-
-        return all_materials, all_authors, ""
+            new_property = dataset.make_property(
+                group,
+                pre_exp=new_pre_exp,
+                act_energy=new_act_energy,
+                author=new_author,
+                year=new_year,
+                isotope=new_isotope,
+                material=new_material,
+                range=(new_range_low, new_range_high),
+                units=None,  # TODO expose this (see #68)
+            )
+            dataset.add_properties(group, [new_property])
+        elif changed_id == f"upload_{group}.contents" and upload_contents:
+            try:
+                table = read_upload(upload_contents, upload_filename)
+            except ValueError as error:
+                import_report = f"Could not read {upload_filename}: {error}"
+            else:
+                nb_added, errors = import_table(table, group)
+                import_report = [
+                    html.Div(line) for line in make_report(nb_added, errors)
+                ]
+
+        # the new materials and authors are added to the options
+        material_options = dataset.search_options(
+            group, "material", material_search, material_filter
+        )
+        author_options = dataset.search_options(
+            group, "author", author_search, author_filter, materials=material_filter
+        )
+        return error_message, import_report, material_options, author_options
 
     return add_property
 
@@ -347,8 +505,10 @@ def create_update_table_data_function(group):
             isotopes=isotope_filter,
             years=year_filter,
         )
+        # refits of the properties with experimental points
+        fit = statistics.refit(statistics.to_arrays(properties_group))
 
-        for prop in properties_group:
+        for i, prop in enumerate(properties_group):
             entry = {}
             for key in TABLE_KEYS:
                 if hasattr(prop, key):
@@ -373,8 +533,108 @@ def create_update_table_data_function(group):
 
                 entry[key] = val
 
+            entry.update(format_refit(fit, i, getattr(prop, "units", None)))
             data.append(entry)
 
         return data
 
     return update_table_data
+
+
+def format_refit(fit, i, units=None):
+    """Formats the refit of a property for the table
+
+    Args:
+        fit (dict): the output of statistics.refit
+        i (int): the index of the property
+        units (str, optional): units added to the pre-exponential factor.
+            Defaults to None.
+
+    Returns:
+        dict: the refit_pre_exp, refit_act_energy and refit_deviation
+            entries of the table, empty for properties without refit
+    """
+    if not np.isfinite(fit["pre_exp"][i]):
+        return {"refit_pre_exp": "", "refit_act_energy": "", "refit_deviation": ""}
+    pre_exp = f"{fit['pre_exp'][i]: .2e}"
+    act_energy = f"{fit['act_energy'][i]:.2f}"
+    if np.isfinite(fit["act_energy_std"][i]):
+        pre_exp += f" ×/÷ {np.exp(fit['log_pre_exp_std'][i]):.2g}"
+        act_energy += f" ± {fit['act_energy_std'][i]:.2f}"
+    if units is not None:
+        pre_exp += f" {units}"
+    return {
+        "refit_pre_exp": pre_exp,
+        "refit_act_energy": act_energy,
+        "refit_deviation": f"{fit['deviation'][i]:.2f}",
+    }
+
+
+def create_update_discrepancy_graph_function(group):
+    def update_discrepancy_graph(
+        figure,
+        cluster,
+        active_tab,
+        material_filter,
+        isotope_filter,
+        author_filter,
+        year_filter,
+    ):
+        # the heatmap is only computed when it is displayed
+        if active_tab != "discrepancy":
+            return dash.no_update
+        properties_group = make_group_of_properties(
+            type_of_prop=group,
+            materials=material_filter,
+            authors=author_filter,
+            isotopes=isotope_filter,
+            years=year_filter,
+        )
+        if len(properties_group) > MAX_DISCREPANCY_PROPERTIES:
+            return make_message_graph(
+                f"{len(properties_group)} properties selected, the heatmap is "
+                f"limited to {MAX_DISCREPANCY_PROPERTIES}: filter the properties"
+            )
+        matrix = dataset.discrepancy(
+            group, material_filter, author_filter, isotope_filter, year_filter
+        )
+        return make_discrepancy_graph(properties_group, matrix, cluster=cluster)
+
+    return update_discrepancy_graph
+
+
+def create_update_ranking_table_function(group):
+    def update_ranking_table(
+        figure,
+        temperature,
+        in_range_only,
+        page_current,
+        page_size,
+        material_filter,
+        isotope_filter,
+        author_filter,
+        year_filter,
+    ):
+        # back to the first page when the ranking changes
+        if dash.callback_context.triggered_id != f"ranking_table_{group}":
+            page_current = 0
+        ranking = dataset.ranking(
+            group,
+            material_filter,
+            author_filter,
+            isotope_filter,
+            year_filter,
+            temperature,
+        )
+        rows, count = dataset.ranking_page(
+            ranking, page_current, page_size, in_range_only=in_range_only
+        )
+        for row in rows:
+            units = row.pop("units")
+            row["value"] = f"{row['value']: .2e}"
+            if units is not None:
+                row["value"] += f" {units}"
+            row["in_range"] = "yes" if row["in_range"] else "no"
+        return rows, max(1, -(-count // page_size)), page_current
+
+    return update_ranking_table
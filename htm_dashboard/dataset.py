@@ -0,0 +1,421 @@
+from functools import lru_cache
+
+import numpy as np
+
+from .graph import make_group_of_properties
+from .groups import GROUPS, type_to_database, make_new_property, get_units
+from . import search, statistics
+
+
+# incremented every time properties are added to a group so that anything
+# derived from the database (option lists, caches, ETags...) can be refreshed
+versions = {group: 0 for group in type_to_database}
+
+
+def add_properties(group: str, properties: list):
+    """Appends properties to the database of a group and invalidates
+    everything derived from it (including the groups computed from it).
+    Should be called once per batch of properties, not once per property.
+
+    Args:
+        group (str): a group of GROUPS
+        properties (list): the new htm properties
+    """
+    if len(properties) == 0:
+        return
+    type_to_database[group].extend(properties)
+    versions[group] += 1
+    for other_group, group_infos in GROUPS.items():
+        if "derived_from" in group_infos:
+            sources, refresh = group_infos["derived_from"]
+            if group in sources:
+                refresh()
+                versions[other_group] += 1
+
+
+def make_property(
+    group: str,
+    pre_exp: float,
+    act_energy: float,
+    author: str,
+    year: int,
+    isotope: str,
+    material: str,
+    range: tuple = (300, 1200),
+    units: str = None,
+):
+    """Creates a new htm property of a given group
+
+    Args:
+        group (str): a group of GROUPS
+        pre_exp (float): the pre-exponential factor
+        act_energy (float): the activation energy in eV
+        author (str): the author
+        year (int): the year of publication
+        isotope (str): "H", "D" or "T"
+        material (str): the material
+        range (tuple, optional): temperature range in K.
+            Defaults to (300, 1200).
+        units (str, optional): units of the property for groups with
+            units_options. Defaults to None (the first option).
+
+    Returns:
+        htm.ArrheniusProperty: the new property
+    """
+    new_property = make_new_property(group, pre_exp, act_energy, units)
+    new_property.author = author.lower()
+    new_property.year = year
+    new_property.isotope = isotope
+    new_property.material = material
+    new_property.range = range
+    return new_property
+
+
+def material_options(group: str):
+    """Returns the sorted list of materials of a group
+
+    Args:
+        group (str): a group of GROUPS
+
+    Returns:
+        list: the lowercase material names
+    """
+    return list(_material_options(group, versions[group]))
+
+
+def author_options(group: str, materials=None):
+    """Returns the sorted list of capitalized authors of a group
+
+    Args:
+        group (str): a group of GROUPS
+        materials (list, optional): only keep authors who published on
+            these materials. Defaults to None (all materials).
+
+    Returns:
+        list: the capitalized author names
+    """
+    if materials is not None:
+        materials = tuple(sorted(materials))
+    return list(_author_options(group, versions[group], materials))
+
+
+@lru_cache(maxsize=64)
+def _material_options(group, version):
+    return tuple(
+        np.unique([prop.material.lower() for prop in type_to_database[group]]).tolist()
+    )
+
+
+@lru_cache(maxsize=256)
+def _author_options(group, version, materials):
+    return tuple(
+        np.unique(
+            [
+                prop.author.capitalize()
+                for prop in type_to_database[group]
+                if materials is None or prop.material in materials
+            ]
+        ).tolist()
+    )
+
+
+def search_options(
+    group: str, kind: str, search_value: str, selected=None, materials=None
+):
+    """Returns the options of a material or author dropdown: the selected
+    values (which must stay in the options) and the best matches of the
+    searched text (see search.search)
+
+    Args:
+        group (str): a group of GROUPS
+        kind (str): "material" or "author"
+        search_value (str): the text typed in the dropdown
+        selected (list, optional): the selected values. Defaults to None.
+        materials (list, optional): only search authors who published on
+            these materials. Defaults to None (all materials).
+
+    Returns:
+        list: the options
+    """
+    if materials is not None:
+        materials = tuple(sorted(materials))
+    index = _search_index(group, versions[group], kind, materials)
+    selected = list(selected or [])
+    options = [{"label": value, "value": value} for value in selected]
+    for match in search.search(index, search_value):
+        if match not in selected:
+            option = {"label": match, "value": match}
+            if search_value:
+                # the dropdown also filters the options with the searched
+                # text, which would hide accent-insensitive and close matches
+                option["search"] = f"{match} {search_value}"
+            options.append(option)
+    return options
+
+
+@lru_cache(maxsize=256)
+def _search_index(group, version, kind, materials):
+    if kind == "material":
+        return search.make_index(material_options(group))
+    return search.make_index(_author_options(group, version, materials))
+
+
+COLUMNS = [
+    "material",
+    "isotope",
+    "author",
+    "year",
+    "pre_exp",
+    "act_energy",
+    "range_low",
+    "range_high",
+    "units",
+    "doi",
+]
+
+
+def to_columns(group_of_properties):
+    """Converts properties to a columnar representation
+
+    Args:
+        group_of_properties (list): htm properties
+
+    Returns:
+        dict: one list per key of COLUMNS, range_low/range_high are None
+            for properties without range and units is None for
+            properties other than solubilities
+    """
+    columns = {key: [] for key in COLUMNS}
+    for prop in group_of_properties:
+        prop_range = prop.range if prop.range is not None else (None, None)
+        columns["material"].append(prop.material)
+        columns["isotope"].append(prop.isotope)
+        columns["author"].append(prop.author)
+        columns["year"].append(prop.year)
+        columns["pre_exp"].append(float(prop.pre_exp))
+        columns["act_energy"].append(float(prop.act_energy))
+        columns["range_low"].append(_float_or_none(prop_range[0]))
+        columns["range_high"].append(_float_or_none(prop_range[1]))
+        columns["units"].append(getattr(prop, "units", None))
+        columns["doi"].append(prop.doi)
+    return columns
+
+
+def _float_or_none(value):
+    if value is None:
+        return None
+    return float(value)
+
+
+def filter_key(group, materials, authors, isotopes, years):
+    """Returns a hashable key identifying a filter state and the version
+    of the data it was applied to, used to cache computations
+
+    Args:
+        group (str): a group of GROUPS
+        materials (list): materials filter
+        authors (list): authors filter
+        isotopes (list): isotopes filter
+        years (list): [min year, max year] or None
+
+    Returns:
+        tuple: the key
+    """
+    return (
+        group,
+        versions[group],
+        tuple(sorted(materials or [])),
+        tuple(sorted(author.lower() for author in authors or [])),
+        tuple(sorted(isotope.lower() for isotope in isotopes or [])),
+        tuple(years) if years else None,
+    )
+
+
+def mean_curve(group, materials, authors, isotopes, years):
+    """Returns the mean curve and spread of the properties matching a
+    filter state (see statistics.mean_curve). Results are cached.
+
+    Args:
+        group (str): a group of GROUPS
+        materials (list): materials filter
+        authors (list): authors filter
+        isotopes (list): isotopes filter
+        years (list): [min year, max year] or None
+
+    Returns:
+        dict: the mean curve
+    """
+    return _mean_curve(filter_key(group, materials, authors, isotopes, years))
+
+
+@lru_cache(maxsize=128)
+def _mean_curve(key):
+    return statistics.mean_curve(statistics.to_arrays(_filtered_group(key)))
+
+
+def _filtered_group(key):
+    group, _, materials, authors, isotopes, years = key
+    return make_group_of_properties(
+        type_of_prop=group,
+        materials=list(materials),
+        authors=list(authors),
+        isotopes=list(isotopes),
+        years=list(years) if years else None,
+    )
+
+
+def envelope(
+    group,
+    materials,
+    authors,
+    isotopes,
+    years,
+    percentiles=(10, 50, 90),
+    T_min=None,
+    T_max=None,
+    nb_points=200,
+):
+    """Returns the percentiles of the properties matching a filter state
+    (see statistics.envelope). Results are cached.
+
+    Args:
+        group (str): a group of GROUPS
+        materials (list): materials filter
+        authors (list): authors filter
+        isotopes (list): isotopes filter
+        years (list): [min year, max year] or None
+        percentiles (tuple, optional): the percentiles to compute.
+            Defaults to (10, 50, 90).
+        T_min (float, optional): lowest temperature in K. Defaults to
+            None (lowest temperature of the ranges).
+        T_max (float, optional): highest temperature in K. Defaults to
+            None (highest temperature of the ranges).
+        nb_points (int, optional): number of temperatures. Defaults to 200.
+
+    Returns:
+        dict: "T", "percentiles", "values" (one array per percentile)
+            and "count" (number of properties defined at each temperature)
+    """
+    key = filter_key(group, materials, authors, isotopes, years)
+    return _envelope(key, tuple(percentiles), T_min, T_max, nb_points)
+
+
+@lru_cache(maxsize=128)
+def _envelope(key, percentiles, T_min, T_max, nb_points):
+    arrays = statistics.to_arrays(_filtered_group(key))
+    T = statistics.temperature_grid(arrays, nb_points)
+    T = np.linspace(
+        T[0] if T_min is None else T_min, T[-1] if T_max is None else T_max, nb_points
+    )
+    values, count = statistics.envelope(arrays, T, percentiles)
+    return {"T": T, "percentiles": percentiles, "values": values, "count": count}
+
+
+def discrepancy(group, materials, authors, isotopes, years):
+    """Returns the pairwise discrepancy matrix of the properties matching
+    a filter state (see statistics.discrepancy). Results are cached.
+
+    Args:
+        group (str): a group of GROUPS
+        materials (list): materials filter
+        authors (list): authors filter
+        isotopes (list): isotopes filter
+        years (list): [min year, max year] or None
+
+    Returns:
+        np.ndarray: the discrepancy matrix in decades
+    """
+    return _discrepancy(filter_key(group, materials, authors, isotopes, years))
+
+
+@lru_cache(maxsize=16)
+def _discrepancy(key):
+    return statistics.discrepancy(statistics.to_arrays(_filtered_group(key)))
+
+
+def ranking(group, materials, authors, isotopes, years, T):
+    """Returns the properties matching a filter state sorted by their value
+    at a temperature (see statistics.values_at). The values of the last
+    temperatures are cached so that moving back on a slider is fast.
+
+    Args:
+        group (str): a group of GROUPS
+        materials (list): materials filter
+        authors (list): authors filter
+        isotopes (list): isotopes filter
+        years (list): [min year, max year] or None
+        T (float): temperature in K
+
+    Returns:
+        dict: "properties" (the filtered properties), "order" (their
+            indices by increasing value), "value" and "in_range" (False
+            for properties without range), in the order of "order"
+    """
+    key = filter_key(group, materials, authors, isotopes, years)
+    properties, arrays, has_range = _arrays(key)
+    values = _values_at(key, float(T))
+    order = np.argsort(values, kind="stable")
+    in_range = (arrays["range_low"] <= T) & (T <= arrays["range_high"]) & has_range
+    return {
+        "properties": properties,
+        "order": order,
+        "value": values[order],
+        "in_range": in_range[order],
+    }
+
+
+# only the values are cached (one array per filter state and temperature),
+# the slider moves by steps of 10 K so the cache is kept small
+@lru_cache(maxsize=16)
+def _values_at(key, T):
+    _, arrays, _ = _arrays(key)
+    values, _ = statistics.values_at(arrays, T)
+    return values[:, 0]
+
+
+@lru_cache(maxsize=32)
+def _arrays(key):
+    properties = _filtered_group(key)
+    has_range = np.array([prop.range is not None for prop in properties], bool)
+    return properties, statistics.to_arrays(properties), has_range
+
+
+def ranking_page(ranking, page, page_size, descending=False, in_range_only=False):
+    """Returns a page of a ranking
+
+    Args:
+        ranking (dict): the output of ranking
+        page (int): the index of the page, starting at 0
+        page_size (int): the number of properties per page
+        descending (bool, optional): highest values first. Defaults to False.
+        in_range_only (bool, optional): only keep the properties whose range
+            contains the temperature. Defaults to False.
+
+    Returns:
+        list, int: the rows of the page ("rank", "material", "isotope",
+            "author", "year", "value", "units" and "in_range") and the
+            number of ranked properties
+    """
+    positions = np.arange(len(ranking["order"]))
+    if in_range_only:
+        positions = positions[ranking["in_range"]]
+    if descending:
+        positions = positions[::-1]
+
+    rows = []
+    start = page * page_size
+    for rank, position in enumerate(positions[start : start + page_size], start + 1):
+        prop = ranking["properties"][ranking["order"][position]]
+        rows.append(
+            {
+                "rank": rank,
+                "material": prop.material,
+                "isotope": prop.isotope,
+                "author": prop.author,
+                "year": prop.year,
+                "value": float(ranking["value"][position]),
+                "units": get_units(prop),
+                "in_range": bool(ranking["in_range"][position]),
+            }
+        )
+    return rows, len(positions)
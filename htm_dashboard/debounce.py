@@ -0,0 +1,103 @@
+import collections
+import os
+import threading
+
+
+# delay (in ms) during which changes of the filters are coalesced in the
+# browser before the graph is updated, 0 to update on every change
+DEBOUNCE_MS = int(os.environ.get("HTM_DASHBOARD_DEBOUNCE_MS", 300))
+# "mouseup" to update the year slider when it is released, "drag" while
+# it is dragged
+SLIDER_UPDATEMODE = os.environ.get("HTM_DASHBOARD_SLIDER_UPDATEMODE", "mouseup")
+
+# maximum number of (browser session, group) whose last sequence is kept
+MAX_ENTRIES = 10000
+
+FILTERS = ["material", "isotope", "author", "year"]
+
+# Coalesces the changes of the filters of a group into its filters_{group}
+# store. Every change gets a sequence number and only the last one of a
+# burst is sent after DEBOUNCE_MS. The random client id and the sequence
+# let the server skip requests superseded by a newer one.
+DEBOUNCE_FUNCTION = """
+function(material, isotope, author, year) {{
+    const state = window.htmDebounce = window.htmDebounce || {{
+        client: Math.random().toString(36).slice(2),
+        sequence: {{}},
+    }};
+    const sequence = (state.sequence["{group}"] || 0) + 1;
+    state.sequence["{group}"] = sequence;
+    const filters = {{
+        material: material,
+        isotope: isotope,
+        author: author,
+        year: year,
+        client: state.client,
+        sequence: sequence,
+    }};
+    return new Promise(resolve => setTimeout(() => resolve(
+        state.sequence["{group}"] === sequence
+            ? filters
+            : window.dash_clientside.no_update
+    ), {delay}));
+}}
+"""
+
+_latest = collections.OrderedDict()
+_lock = threading.Lock()
+
+
+def make_debounce_function(group: str):
+    """Returns the clientside function coalescing the filters of a group
+
+    Args:
+        group (str): a group of GROUPS
+
+    Returns:
+        str: the javascript function
+    """
+    return DEBOUNCE_FUNCTION.format(group=group, delay=DEBOUNCE_MS)
+
+
+def make_filters(material, isotope, author, year):
+    """Returns the initial data of a filters_{group} store
+
+    Returns:
+        dict: the filters, with no client and a sequence of 0
+    """
+    return {
+        "material": material,
+        "isotope": isotope,
+        "author": author,
+        "year": year,
+        "client": None,
+        "sequence": 0,
+    }
+
+
+def unpack(filters: dict):
+    """Returns the values of the filters in the order of FILTERS"""
+    return tuple(filters[key] for key in FILTERS)
+
+
+def is_stale(group: str, filters: dict):
+    """Checks if newer filters were received from the same browser.
+    Requests are only compared within a worker process.
+
+    Args:
+        group (str): a group of GROUPS
+        filters (dict): the data of the filters_{group} store
+
+    Returns:
+        bool: True if the request has been superseded
+    """
+    if filters.get("client") is None:
+        return False
+    key = (filters["client"], group)
+    with _lock:
+        latest = max(_latest.get(key, 0), filters["sequence"])
+        _latest[key] = latest
+        _latest.move_to_end(key)
+        while len(_latest) > MAX_ENTRIES:
+            _latest.popitem(last=False)
+    return filters["sequence"] < latest
@@ -1,11 +1,29 @@
 import h_transport_materials as htm
+import io
 import json
 from jinja2 import Template
+import numpy as np
+
+from . import statistics
+from .groups import get_units
+
+
+def create_data_as_dict(group: htm.PropertiesGroup, progress=None):
+    """Exports properties to JSON with their bibtex sources
 
+    Args:
+        group (htm.PropertiesGroup): the properties
+        progress (callable, optional): called with the number of exported
+            properties and the total, about every 5%. Defaults to None.
 
-def create_data_as_dict(group: htm.PropertiesGroup):
+    Returns:
+        str: the JSON
+    """
     data = {}
-    for property in group:
+    step = max(1, len(group) // 20)
+    for i, property in enumerate(group):
+        if progress is not None and i % step == 0:
+            progress(i, len(group))
         name = "{}_{}_{}".format(property.isotope, property.author, property.year)
         if property.bibsource:
             source = property.bibdata.to_string("bibtex")
@@ -23,40 +41,100 @@ def create_data_as_dict(group: htm.PropertiesGroup):
     return json.dumps(data, indent=2)
 
 
-type_to_database = {
-    "diffusivity": "htm.diffusivities",
-    "solubility": "htm.solubilities",
-    "recombination_coeff": "htm.recombination_coeffs",
-}
+def create_data_as_npz(group: htm.PropertiesGroup, info: dict = None):
+    """Exports properties to a compressed numpy archive (.npz) with one
+    array per column and the experimental points of all properties
+    concatenated (data_T, data_y and data_index, the index of their
+    property). It only contains numbers and strings and is loaded with
+    np.load without pickle.
+
+    Args:
+        group (htm.PropertiesGroup): the properties
+        info (dict, optional): metadata saved as JSON in the "info" array
+            (ex: the group and the filters). Defaults to None.
+
+    Returns:
+        bytes: the content of the .npz file
+    """
+    arrays = statistics.to_arrays(group)
+    columns = {
+        key: arrays[key]
+        for key in [
+            "pre_exp",
+            "act_energy",
+            "range_low",
+            "range_high",
+            "data_T",
+            "data_y",
+            "data_index",
+        ]
+    }
+    columns["has_range"] = np.array([prop.range is not None for prop in group], bool)
+    columns["year"] = np.array([prop.year for prop in group], dtype=int)
+    for key in ["material", "isotope", "author"]:
+        columns[key] = np.array([str(getattr(prop, key)) for prop in group], dtype=str)
+    columns["units"] = np.array([str(get_units(prop)) for prop in group], dtype=str)
+    columns["doi"] = np.array([str(prop.doi or "") for prop in group], dtype=str)
+    columns["source"] = np.array([str(prop.source or "") for prop in group], dtype=str)
+    columns["info"] = np.array(json.dumps(info or {}))
+
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **columns)
+    return buffer.getvalue()
 
 
 python_template = Template(
-    """import h_transport_materials as htm
-import matplotlib.pyplot as plt
+    """import matplotlib.pyplot as plt
 import numpy as np
 
-filtered_{{group}} = (
-    {{database}}.filter(material={{materials}})
-    .filter(author={{authors}})
-    .filter(isotope={{isotopes}})
-    .filter(year=np.arange({{yearmin}}, {{yearmax}}, step=1).tolist())
-)
+# {{ group }} of {{ materials }}
+# isotopes: {{ isotopes }}, years: {{ yearmin }}-{{ yearmax }}
+# authors: {{ authors }}
+data = np.load("{{ filename }}")
+
+k_B = 8.617333262e-5  # eV/K
+
+for i in range(len(data["pre_exp"])):
+    label = "{} {} ({})".format(
+        data["isotope"][i], data["author"][i].capitalize(), data["year"][i]
+    )
+    T = np.linspace(data["range_low"][i], data["range_high"][i], num=500)
+    value = data["pre_exp"][i] * np.exp(-data["act_energy"][i] / k_B / T)
+    line, = plt.plot(1 / T, value, label=label)
 
-htm.plotting.plot(filtered_{{group}})
+    points = data["data_index"] == i
+    if points.any():
+        plt.scatter(
+            1 / data["data_T"][points], data["data_y"][points], color=line.get_color()
+        )
 
 plt.legend()
 plt.xlabel("1/T (K$^{-1}$)")
 plt.yscale("log")
 plt.show()
-
 """
 )
 
 
-def generate_python_code(materials, authors, isotopes, yearmin, yearmax, group):
+def generate_python_code(
+    materials, authors, isotopes, yearmin, yearmax, group, filename="data.npz"
+):
+    """Generates a script plotting the properties of the file exported by
+    create_data_as_npz
+
+    Args:
+        materials, authors, isotopes, yearmin, yearmax: the filters, written
+            in a comment
+        group (str): a group of GROUPS
+        filename (str, optional): the name of the .npz file. Defaults to
+            "data.npz".
+
+    Returns:
+        str: the script
+    """
     python_code = python_template.render(
         group=group,
-        database=type_to_database[group],
+        filename=filename,
         materials=[mat.lower() for mat in materials],
         authors=[author.lower() for author in authors],
         isotopes=[iso.lower() for iso in isotopes],
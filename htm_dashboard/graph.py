@@ -1,9 +1,16 @@
+from functools import lru_cache
+import os
+
 import plotly.graph_objects as go
 import plotly.io as pio
 import h_transport_materials as htm
 import numpy as np
 import plotly.express as px
 
+from . import statistics
+from .metrics import record_group_size
+from .groups import GROUPS, class_to_group, type_to_database, units_to_html, get_units
+
 
 TEMPLATE_LIGHT = "plotly_white"
 TEMPLATE_DARK = "cyborg"
@@ -13,54 +20,138 @@ pio.templates.default = TEMPLATE_LIGHT
 
 colours = px.colors.qualitative.Plotly
 
-type_to_database = {
-    "diffusivity": htm.diffusivities,
-    "solubility": htm.solubilities,
-    "recombination_coeff": htm.recombination_coeffs,
-}
+MEAN_LEGENDGROUP = "mean"
+ENVELOPE_LEGENDGROUP = "envelope"
+DATA_LEGENDGROUP = "data"
+
+# hovertemplate of the experimental points, the label of the property of
+# each point is read from customdata
+DATA_HOVERTEMPLATE = "%{customdata}<br>(%{x:.2e}, %{y:.2e})<extra></extra>"
+
+# maximum number of experimental points plotted per property, 0 for all
+MAX_POINTS_PER_PROPERTY = int(
+    os.environ.get("HTM_DASHBOARD_MAX_POINTS_PER_PROPERTY", 1000)
+)
+# maximum number of properties of the discrepancy heatmap (n x n cells)
+MAX_DISCREPANCY_PROPERTIES = int(
+    os.environ.get("HTM_DASHBOARD_MAX_DISCREPANCY_PROPERTIES", 1000)
+)
 
 
-def add_mean_value(group: htm.PropertiesGroup, fig: go.Figure):
-    pre_exp, act_energy = group.mean()
-    mean_prop = htm.ArrheniusProperty(pre_exp, act_energy)
+def add_mean_value(group: htm.PropertiesGroup, fig: go.Figure, mean: dict = None):
+    """Adds the mean curve of a group of properties and the spread of the
+    properties to a figure
+
+    Args:
+        group (htm.PropertiesGroup): the properties
+        fig (go.Figure): the figure
+        mean (dict, optional): the mean curve of the group if already
+            computed (see statistics.mean_curve). Defaults to None.
+    """
+    if mean is None:
+        mean = statistics.mean_curve(statistics.to_arrays(group))
+    fig.add_traces(make_mean_traces(group, mean))
+
+
+def make_mean_traces(group: htm.PropertiesGroup, mean: dict):
+    """Makes the traces of the mean curve and of the spread band
+
+    Args:
+        group (htm.PropertiesGroup): the properties
+        mean (dict): the mean curve of the group (see statistics.mean_curve)
+
+    Returns:
+        list: the go.Scatter traces
+    """
     label = "Mean value"
-    T = np.linspace(300, 1200, num=500)
-    hovertemplate = (
-        "<b>%{text}</b><br><br>"
-        + "1/T: %{x:,.2e} K<sup>-1</sup><br>"
-        + "T: %{customdata:.0f} K<br>"
+    materials = ", ".join(np.unique([prop.material for prop in group]).tolist())
+    band_style = dict(
+        mode="lines",
+        line=dict(color="rgba(0, 0, 0, 0)"),
+        legendgroup=MEAN_LEGENDGROUP,
+        showlegend=False,
+        hoverinfo="skip",
     )
-    if isinstance(group[0], htm.Solubility):
-        hovertemplate += (
-            "S: %{y:,.2e}"
-            + f"S_0: {mean_prop.pre_exp:.2e} <br>"
-            + f"E_S : {mean_prop.act_energy:.2f} eV"
-        )
-    elif isinstance(group[0], htm.Diffusivity):
-        hovertemplate += (
-            "D: %{y:,.2e} m<sup>2</sup>/s <br>"
-            + f"D_0: {mean_prop.pre_exp:.2e} m<sup>2</sup>/s <br>"
-            + f"E_D : {mean_prop.act_energy:.2f} eV"
-        )
-    elif isinstance(group[0], htm.RecombinationCoeff):
-        hovertemplate += (
-            "Kr: %{y:,.2e} m<sup>4</sup>/s <br>"
-            + f"Kr_0: {mean_prop.pre_exp:.2e} m<sup>4</sup>/s <br>"
-            + f"E_Kr : {mean_prop.act_energy:.2f} eV"
-        )
-    hovertemplate += "<extra></extra>"
-    fig.add_trace(
+    return [
+        go.Scatter(x=1 / mean["T"], y=mean["low"], name="Min", **band_style),
+        go.Scatter(
+            x=1 / mean["T"],
+            y=mean["high"],
+            name="Max",
+            fill="tonexty",
+            fillcolor="rgba(128, 128, 128, 0.3)",
+            **band_style,
+        ),
         go.Scatter(
-            x=1 / T,
-            y=mean_prop.value(T),
+            x=1 / mean["T"],
+            y=mean["value"],
             name=label,
             mode="lines",
-            text=[label] * len(T),
+            legendgroup=MEAN_LEGENDGROUP,
             line=dict(color="black", width=4),
-            customdata=T,
-            hovertemplate=hovertemplate,
-        )
+            customdata=mean["T"],
+            meta=[label, materials, mean["pre_exp"], mean["act_energy"]],
+            hovertemplate=make_hovertemplate(type(group[0]), get_units(group[0])),
+        ),
+    ]
+
+
+def make_envelope_traces(envelope: dict):
+    """Makes the traces of the percentiles of a group of properties. The
+    area between the lowest and highest percentiles is filled.
+
+    Args:
+        envelope (dict): the percentiles (see dataset.envelope)
+
+    Returns:
+        list: the go.Scatter traces
+    """
+    x = 1 / envelope["T"]
+    style = dict(
+        mode="lines",
+        legendgroup=ENVELOPE_LEGENDGROUP,
+        customdata=np.stack((envelope["T"], envelope["count"]), axis=-1),
+        hovertemplate=(
+            "<b>%{meta}</b><br><br>"
+            + "T: %{customdata[0]:.0f} K<br>"
+            + "value: %{y:,.2e}<br>"
+            + "%{customdata[1]} properties"
+            + "<extra></extra>"
+        ),
     )
+    labels = [f"{percentile:g}th percentile" for percentile in envelope["percentiles"]]
+    traces = [
+        go.Scatter(
+            x=x,
+            y=envelope["values"][0],
+            name=labels[0],
+            meta=labels[0],
+            line=dict(color="grey", width=1),
+            **style,
+        ),
+        go.Scatter(
+            x=x,
+            y=envelope["values"][-1],
+            name=labels[-1],
+            meta=labels[-1],
+            line=dict(color="grey", width=1),
+            fill="tonexty",
+            fillcolor="rgba(128, 128, 128, 0.2)",
+            **style,
+        ),
+    ]
+    for label, values in zip(labels[1:-1], envelope["values"][1:-1]):
+        traces.append(
+            go.Scatter(
+                x=x,
+                y=values,
+                name=label,
+                meta=label,
+                line=dict(color="grey", width=2, dash="dash"),
+                **style,
+            )
+        )
+    return traces
 
 
 def make_group_of_properties(
@@ -81,6 +172,7 @@ def make_group_of_properties(
                 year=np.arange(years[0], years[1] + 1, step=1).tolist()
             )
 
+    record_group_size(len(filtered_group))
     return filtered_group
 
 
@@ -113,6 +205,70 @@ def list_of_colours(prop_group, colour_by):
         return [colours[i % 10] for i in iso_idx]
 
 
+def make_label(prop):
+    """Returns the legend label of a property (ex: "H Frauenfelder (1969)")"""
+    return f"{prop.isotope} {prop.author.capitalize()} ({prop.year})"
+
+
+def decimate(nb_points: int, max_points: int):
+    """Returns the indices of evenly spaced points, including the first and
+    the last ones
+
+    Args:
+        nb_points (int): the number of points
+        max_points (int): the maximum number of points kept, 0 to keep all
+
+    Returns:
+        np.ndarray: the indices of the points kept
+    """
+    if max_points <= 0 or nb_points <= max_points:
+        return np.arange(nb_points)
+    return np.unique(np.linspace(0, nb_points - 1, num=max_points).round().astype(int))
+
+
+def make_data_traces(group_of_properties, colour_list, max_points=None):
+    """Makes the traces of the experimental points of the properties. Points
+    of the same colour are batched in one WebGL trace, the label of the
+    property of each point is in customdata.
+
+    Args:
+        group_of_properties (htm.PropertiesGroup): the properties
+        colour_list (list): the colours of the properties
+            (see list_of_colours)
+        max_points (int, optional): maximum number of points per property.
+            Defaults to None (MAX_POINTS_PER_PROPERTY).
+
+    Returns:
+        list: the go.Scattergl traces
+    """
+    if max_points is None:
+        max_points = MAX_POINTS_PER_PROPERTY
+    batches = {}
+    for prop, colour in zip(group_of_properties, colour_list):
+        if prop.data_T is None:
+            continue
+        indices = decimate(len(prop.data_T), max_points)
+        x, y, labels = batches.setdefault(colour, ([], [], []))
+        x.append(1 / np.asarray(prop.data_T)[indices])
+        y.append(np.asarray(prop.data_y)[indices])
+        labels += [make_label(prop)] * len(indices)
+
+    return [
+        go.Scattergl(
+            x=np.concatenate(x),
+            y=np.concatenate(y),
+            customdata=labels,
+            name="Experimental points",
+            mode="markers",
+            marker=dict(color=colour),
+            legendgroup=DATA_LEGENDGROUP,
+            showlegend=False,
+            hovertemplate=DATA_HOVERTEMPLATE,
+        )
+        for colour, (x, y, labels) in batches.items()
+    ]
+
+
 def make_graph(group_of_properties: htm.PropertiesGroup, colour_by="property"):
     """Creates a graph for visualising properties.
 
@@ -125,9 +281,18 @@ def make_graph(group_of_properties: htm.PropertiesGroup, colour_by="property"):
     """
     fig = go.Figure()
     colour_list = list_of_colours(group_of_properties, colour_by)
+    hovertemplates = [
+        make_hovertemplate(type(prop), get_units(prop)) for prop in group_of_properties
+    ]
+    # the most common hovertemplate is sent once in the template of the
+    # figure, only the lines with other units carry their own
+    default_hovertemplate = (
+        max(set(hovertemplates), key=hovertemplates.count) if hovertemplates else None
+    )
+    set_default_hovertemplate(fig, default_hovertemplate)
     for i, prop in enumerate(group_of_properties):
 
-        label = f"{prop.isotope} {prop.author.capitalize()} ({prop.year})"
+        label = make_label(prop)
         range = prop.range
         if prop.range is None:
             if prop.data_T is not None:
@@ -142,50 +307,55 @@ def make_graph(group_of_properties: htm.PropertiesGroup, colour_by="property"):
                 name=label,
                 mode="lines",
                 line=dict(color=colour_list[i]),
-                text=[label] * len(T),
                 customdata=T,
-                hovertemplate=make_hovertemplate(prop),
+                meta=[label, prop.material, prop.pre_exp, prop.act_energy],
+                hovertemplate=(
+                    None
+                    if hovertemplates[i] == default_hovertemplate
+                    else hovertemplates[i]
+                ),
             )
         )
-        if prop.data_T is not None:
-            fig.add_trace(
-                go.Scatter(
-                    x=1 / prop.data_T,
-                    y=prop.data_y,
-                    name=label,
-                    mode="markers",
-                    marker=dict(color=fig.data[-1].line.color),
-                )
-            )
+    fig.add_traces(make_data_traces(group_of_properties, colour_list))
 
     update_axes(fig, group_of_properties)
     # fig.write_html("out.html")
     return fig
 
 
+def set_default_hovertemplate(fig: go.Figure, hovertemplate: str):
+    """Sets the hovertemplate of the Scatter traces without one in the
+    template of a figure, so that it is serialized once for all the lines
+
+    Args:
+        fig (go.Figure): the figure
+        hovertemplate (str): the hovertemplate, None to do nothing
+    """
+    if hovertemplate is None:
+        return
+    defaults = fig.layout.template.data.scatter
+    default = go.Scatter(defaults[0]) if defaults else go.Scatter()
+    default.hovertemplate = hovertemplate
+    fig.layout.template.data.scatter = [default]
+
+
 def update_axes(fig, group_of_properties):
     if len(group_of_properties) == 0:
         return
 
-    if isinstance(group_of_properties[0], htm.Solubility):
-        all_units = np.unique([S.units for S in group_of_properties]).tolist()
-        if len(all_units) == 1:
-            if all_units == ["m-3 Pa-1/2"]:
-                yticks_suffix = "m<sup>-3</sup> Pa<sup>-1/2</sup>"
-            elif all_units == ["m-3 Pa-1"]:
-                yticks_suffix = "m<sup>-3</sup> Pa<sup>-1</sup>"
-            title_units = f"({yticks_suffix})"
-        else:
-            # if the group contains mixed units, display nothing
-            title_units = "(mixed units)"
-            yticks_suffix = ""
-        ylabel = f"Solubility {title_units}"
-    elif isinstance(group_of_properties[0], htm.Diffusivity):
-        ylabel = "Diffusivity"
-        yticks_suffix = " m<sup>2</sup>/s"
-    elif isinstance(group_of_properties[0], htm.RecombinationCoeff):
-        ylabel = "Recombination coefficient"
-        yticks_suffix = " m<sup>4</sup>/s"
+    group = GROUPS[class_to_group[type(group_of_properties[0])]]
+    all_units = np.unique([get_units(prop) for prop in group_of_properties]).tolist()
+    if len(all_units) == 1:
+        yticks_suffix = " " + units_to_html.get(all_units[0], all_units[0])
+        title_units = f"({yticks_suffix.strip()})"
+    else:
+        # if the group contains mixed units, display nothing
+        title_units = "(mixed units)"
+        yticks_suffix = ""
+    if group["units"] is None:
+        ylabel = f"{group['name']} {title_units}"
+    else:
+        ylabel = group["name"]
 
     xticks_suffix = " K<sup>-1</sup>"
 
@@ -195,32 +365,35 @@ def update_axes(fig, group_of_properties):
     fig.update_xaxes(title_text="1/T", tickformat=".2e", ticksuffix=xticks_suffix)
 
 
-def make_hovertemplate(prop):
-    if isinstance(prop, htm.Solubility):
-        return (
-            "<b>%{text}</b><br><br>"
-            + prop.material
-            + "<br>"
-            + "1/T: %{x:,.2e} K<sup>-1</sup><br>"
-            + "T: %{customdata:.0f} K<br>"
-            + "S: %{y:,.2e}"
-            + f" {prop.units}<br>"
-            + f"S_0: {prop.pre_exp:.2e} {prop.units} <br>"
-            + f"E_S : {prop.act_energy:.2f} eV"
-            + "<extra></extra>"
-        )
-    else:
-        return (
-            "<b>%{text}</b><br><br>"
-            + prop.material
-            + "<br>"
-            + "1/T: %{x:,.2e} K<sup>-1</sup><br>"
-            + "T: %{customdata:.0f} K<br>"
-            + "D: %{y:,.2e} m<sup>2</sup>/s <br>"
-            + f"D_0: {prop.pre_exp:.2e} m<sup>2</sup>/s <br>"
-            + f"E_D : {prop.act_energy:.2f} eV"
-            + "<extra></extra>"
-        )
+@lru_cache(maxsize=None)
+def make_hovertemplate(prop_class, units=None):
+    """Returns the hovertemplate of a type of property.
+
+    Templates are shared by all the traces of the same type of property
+    (and units), the values of each property are read from the trace
+    meta: [label, material, pre-exponential factor, activation energy].
+    make_graph sends the most common one once in the figure template.
+    The temperature is read from customdata.
+
+    Args:
+        prop_class (type): the class of the property (ex: htm.Diffusivity)
+        units (str, optional): the units of the property. Defaults to None.
+
+    Returns:
+        str: the hovertemplate
+    """
+    symbol = GROUPS[class_to_group[prop_class]]["symbol"]
+    prop_units = units_to_html.get(units, units or "")
+    return (
+        "<b>%{meta[0]}</b><br><br>"
+        + "%{meta[1]}<br>"
+        + "1/T: %{x:,.2e} K<sup>-1</sup><br>"
+        + "T: %{customdata:.0f} K<br>"
+        + f"{symbol}: %{{y:,.2e}} {prop_units}<br>"
+        + f"{symbol}_0: %{{meta[2]:.2e}} {prop_units}<br>"
+        + f"E_{symbol} : %{{meta[3]:.2f}} eV"
+        + "<extra></extra>"
+    )
 
 
 def make_figure_prop_per_year(group, step, selected_years=[1950, 2022]):
@@ -327,3 +500,65 @@ def make_piechart_author(prop_group):
 
     fig = go.Figure(data=[go.Pie(labels=labels, values=values)])
     return fig
+
+
+def make_discrepancy_graph(prop_group, matrix, cluster=False):
+    """Makes a heatmap of the pairwise discrepancy between properties
+
+    Args:
+        prop_group (list): the properties
+        matrix (np.ndarray): their discrepancy matrix
+            (see statistics.discrepancy)
+        cluster (bool, optional): if True, similar properties are
+            grouped together. Defaults to False.
+
+    Returns:
+        go.Figure: the heatmap
+    """
+    labels = []
+    for prop in prop_group:
+        label = (
+            f"{prop.material} {prop.isotope} {prop.author.capitalize()} ({prop.year})"
+        )
+        # heatmap categories must be unique
+        while label in labels:
+            label += " "
+        labels.append(label)
+
+    if cluster:
+        order = statistics.cluster_order(matrix)
+        matrix = matrix[np.ix_(order, order)]
+        labels = [labels[i] for i in order]
+
+    fig = go.Figure(
+        go.Heatmap(
+            z=matrix,
+            x=labels,
+            y=labels,
+            colorscale="Viridis",
+            colorbar=dict(title="decades"),
+            hovertemplate="%{x}<br>%{y}<br>max |log<sub>10</sub> ratio|: %{z:.2f}"
+            + "<extra></extra>",
+        )
+    )
+    fig.update_xaxes(showticklabels=len(labels) <= 50)
+    fig.update_yaxes(showticklabels=len(labels) <= 50, autorange="reversed")
+    return fig
+
+
+def make_message_graph(message: str):
+    """Makes an empty figure showing a message
+
+    Args:
+        message (str): the message
+
+    Returns:
+        go.Figure: the figure
+    """
+    fig = go.Figure()
+    fig.add_annotation(
+        text=message, xref="paper", yref="paper", x=0.5, y=0.5, showarrow=False
+    )
+    fig.update_xaxes(visible=False)
+    fig.update_yaxes(visible=False)
+    return fig
@@ -0,0 +1,151 @@
+import h_transport_materials as htm
+
+from . import permeability, synthetic
+
+
+# Registry of the groups of properties shown in the dashboard, in the order
+# of the tabs. Each group defines:
+# - database: the list of properties
+# - prop_class: the htm class of the properties
+# - pre_exp_arg, act_energy_arg: the names of the arguments of prop_class
+# - label: the label of the tab
+# - name: the name of the property (axis titles)
+# - symbol: the symbol of the property (hover, table and form labels)
+# - units: the units of the property, or None if they are set per property
+#   (the "units" attribute) in which case units_options lists them
+# - derived_from: the groups the database is computed from and the function
+#   recomputing it when they change
+GROUPS = {
+    "diffusivity": {
+        "database": htm.diffusivities,
+        "prop_class": htm.Diffusivity,
+        "pre_exp_arg": "D_0",
+        "act_energy_arg": "E_D",
+        "label": "Diffusivity",
+        "name": "Diffusivity",
+        "symbol": "D",
+        "units": "m2/s",
+    },
+    "solubility": {
+        "database": htm.solubilities,
+        "prop_class": htm.Solubility,
+        "pre_exp_arg": "S_0",
+        "act_energy_arg": "E_S",
+        "label": "Solubility",
+        "name": "Solubility",
+        "symbol": "S",
+        "units": None,
+        "units_options": ["m-3 Pa-1/2", "m-3 Pa-1"],
+    },
+    "permeability": {
+        "database": permeability.permeabilities,
+        "prop_class": htm.Permeability,
+        "pre_exp_arg": "pre_exp",
+        "act_energy_arg": "act_energy",
+        "label": "Permeability",
+        "name": "Permeability",
+        "symbol": "P",
+        "units": None,
+        "units_options": ["m-1 s-1 Pa-1/2", "m-1 s-1 Pa-1"],
+        "derived_from": (["diffusivity", "solubility"], permeability.refresh),
+    },
+    "recombination_coeff": {
+        "database": htm.recombination_coeffs,
+        "prop_class": htm.RecombinationCoeff,
+        "pre_exp_arg": "pre_exp",
+        "act_energy_arg": "act_energy",
+        "label": "Recombination coeff.",
+        "name": "Recombination coefficient",
+        "symbol": "Kr",
+        "units": "m4/s",
+    },
+    "dissociation_coeff": {
+        "database": htm.dissociation_coeffs,
+        "prop_class": htm.DissociationCoeff,
+        "pre_exp_arg": "pre_exp",
+        "act_energy_arg": "act_energy",
+        "label": "Dissociation coeff.",
+        "name": "Dissociation coefficient",
+        "symbol": "Kd",
+        "units": "m-3 Pa-1",
+    },
+}
+
+# for scale testing, the databases are replaced by synthetic properties.
+# Derived groups get their own synthetic properties and aren't recomputed.
+if synthetic.SIZE:
+    for group in GROUPS:
+        GROUPS[group]["database"] = synthetic.make_properties(
+            GROUPS[group], synthetic.SIZE, seed=synthetic.SEED
+        )
+        GROUPS[group].pop("derived_from", None)
+
+type_to_database = {group: GROUPS[group]["database"] for group in GROUPS}
+
+class_to_group = {GROUPS[group]["prop_class"]: group for group in GROUPS}
+
+units_to_html = {
+    "m2/s": "m<sup>2</sup>/s",
+    "m4/s": "m<sup>4</sup>/s",
+    "m-3 Pa-1/2": "m<sup>-3</sup> Pa<sup>-1/2</sup>",
+    "m-3 Pa-1": "m<sup>-3</sup> Pa<sup>-1</sup>",
+    "m-1 s-1 Pa-1/2": "m<sup>-1</sup> s<sup>-1</sup> Pa<sup>-1/2</sup>",
+    "m-1 s-1 Pa-1": "m<sup>-1</sup> s<sup>-1</sup> Pa<sup>-1</sup>",
+}
+
+
+def get_units(prop):
+    """Returns the units of a property
+
+    Args:
+        prop (htm.ArrheniusProperty): the property
+
+    Returns:
+        str: the units (ex: "m2/s"), None if unknown
+    """
+    group = class_to_group.get(type(prop))
+    if group is None:
+        return None
+    return GROUPS[group]["units"] or getattr(prop, "units", None)
+
+
+def make_new_property(group: str, pre_exp: float, act_energy: float, units=None):
+    """Creates a property of a group with the class of the registry
+
+    Args:
+        group (str): the group
+        pre_exp (float): the pre-exponential factor
+        act_energy (float): the activation energy in eV
+        units (str, optional): the units if the group has units_options.
+            Defaults to None (the first option).
+
+    Returns:
+        htm.ArrheniusProperty: the property
+    """
+    group_infos = GROUPS[group]
+    kwargs = {
+        group_infos["pre_exp_arg"]: pre_exp,
+        group_infos["act_energy_arg"]: act_energy,
+    }
+    if group_infos["units"] is not None:
+        return group_infos["prop_class"](**kwargs)
+
+    units = units or group_infos["units_options"][0]
+    if group_infos["prop_class"] is htm.Solubility:
+        return htm.Solubility(units=units, **kwargs)
+    new_property = group_infos["prop_class"](**kwargs)
+    new_property.units = units
+    return new_property
+
+
+def pre_exp_label(group: str):
+    """Returns the label of the pre-exponential factor (ex: "D_0 (m2/s)")"""
+    symbol, units = GROUPS[group]["symbol"], GROUPS[group]["units"]
+    if units is None:
+        return f"{symbol}_0"
+    return f"{symbol}_0 ({units})"
+
+
+def act_energy_label(group: str):
+    """Returns the label of the activation energy (ex: "E_D (eV)")"""
+    return "E_{} (eV)".format(GROUPS[group]["symbol"])
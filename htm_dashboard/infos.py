@@ -20,10 +20,27 @@ text_infos = [
         "On the left-hand side of the screen, properties can be filtered by material, author, isotope or by year of publication."
     ),
     html.Br(),
+    html.Div(
+        [
+            html.B("Permeability"),
+            ": permeabilities are computed from all the diffusivities and solubilities "
+            "of the same material and isotope with overlapping temperature ranges. "
+            "Pairs from different authors are labelled 'diffusivity author/solubility author'.",
+        ]
+    ),
+    html.Br(),
     html.Div(
         [
             html.B("Compute mean curve"),
-            ": calculates the mean curve of the displayed properties.",
+            ": calculates the mean curve of the displayed properties and shows their spread (min/max).",
+        ]
+    ),
+    html.Br(),
+    html.Div(
+        [
+            html.B("Percentiles"),
+            ": shows percentiles of the displayed properties at each temperature "
+            "(only properties whose range contains the temperature are considered).",
         ]
     ),
     html.Br(),
@@ -34,6 +51,15 @@ text_infos = [
         ]
     ),
     html.Br(),
+    html.Div(
+        [
+            html.B("Import properties"),
+            ": adds many properties at once from a CSV or JSON file with the columns "
+            "material, isotope, author, year, pre_exp, act_energy "
+            "and optionally range_low, range_high and units.",
+        ]
+    ),
+    html.Br(),
     html.Div(
         [html.B("Extract data"), ": downloads the displayed properties to a JSON file."]
     ),
@@ -41,7 +67,7 @@ text_infos = [
     html.Div(
         [
             html.B("Python"),
-            ": generates a python script using h-transport-materials to plot the displayed data.",
+            ": downloads the displayed data (.npz file with all the columns and experimental points) and a python script plotting it.",
         ]
     ),
     html.Br(),
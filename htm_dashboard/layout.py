@@ -2,8 +2,9 @@ from .infos import text_infos
 from .new_property_form import make_form
 
 from .tab import make_tab
+from .groups import GROUPS
 
-from dash import html
+from dash import dcc, html
 import dash_bootstrap_components as dbc
 from dash_bootstrap_templates import ThemeSwitchAIO
 
@@ -109,23 +110,14 @@ layout = dbc.Container(
         html.Hr(),
         dbc.Tabs(
             id="tabs-example-graph",
-            children=[
-                make_tab("diffusivity"),
-                make_tab("solubility"),
-                dbc.Tab(
-                    label="Permeability",
-                    children=[html.Div([dbc.Label("Work in progress", id="wip_1")])],
-                ),
-                make_tab("recombination_coeff"),
-                dbc.Tab(
-                    label="Dissociation coeff.",
-                    children=[html.Div([dbc.Label("Work in progress", id="wip_3")])],
-                ),
-            ],
+            children=[make_tab(group) for group in GROUPS],
+            active_tab=list(GROUPS)[0],
         ),
-        make_modal_add_property("diffusivity"),
-        make_modal_add_property("solubility"),
-        make_modal_add_property("recombination_coeff"),
+        # only the content of the selected tab is rendered, the others
+        # are kept in their dcc.Store
+        html.Div(id="tab_content"),
+        *[dcc.Store(id=f"tab_state_{group}") for group in GROUPS],
+        *[make_modal_add_property(group) for group in GROUPS],
     ],
     fluid=True,
     className="dbc bg-opacity-10 bg-black mb-2",
@@ -0,0 +1,222 @@
+import contextvars
+import functools
+import os
+import threading
+import time
+
+import flask
+import plotly.graph_objects as go
+
+
+# set to 0 to disable the instrumentation of the callbacks and /metrics
+ENABLED = os.environ.get("HTM_DASHBOARD_METRICS", "1") != "0"
+
+# Prometheus histograms of the callbacks, labelled by callback and group.
+# series maps the labels to the counts of each bucket, the sum and the count.
+HISTOGRAMS = {
+    "htm_dashboard_callback_duration_seconds": {
+        "help": "Wall time of the callbacks",
+        "buckets": [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+        "series": {},
+    },
+    "htm_dashboard_callback_group_size": {
+        "help": "Number of filtered properties in the callbacks",
+        "buckets": [0, 1, 10, 100, 1e3, 1e4, 1e5, 1e6],
+        "series": {},
+    },
+    "htm_dashboard_callback_traces": {
+        "help": "Number of traces of the figures returned by the callbacks",
+        "buckets": [1, 10, 100, 1e3, 1e4],
+        "series": {},
+    },
+    "htm_dashboard_callback_response_bytes": {
+        "help": "Size of the uncompressed responses of the callbacks",
+        "buckets": [1e3, 1e4, 1e5, 1e6, 1e7, 1e8],
+        "series": {},
+    },
+}
+
+# values recorded by the background jobs are pushed in the job queue under
+# this prefix, and kept at most QUEUE_EXPIRE seconds if not collected
+QUEUE_PREFIX = "htm_dashboard_metrics"
+QUEUE_EXPIRE = 3600
+
+_lock = threading.Lock()
+
+# what the running callback has recorded (see record_group_size)
+_current = contextvars.ContextVar("htm_dashboard_metrics", default=None)
+
+
+def observe(name: str, labels: tuple, value: float):
+    """Adds a value to a histogram
+
+    Args:
+        name (str): the name of the histogram in HISTOGRAMS
+        labels (tuple): the callback and the group
+        value (float): the value
+    """
+    histogram = HISTOGRAMS[name]
+    with _lock:
+        series = histogram["series"].setdefault(
+            labels, [0] * len(histogram["buckets"]) + [0.0, 0]
+        )
+        for i, bound in enumerate(histogram["buckets"]):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+
+def push(queue, name: str, labels: tuple, value: float):
+    """Pushes a value to the job queue, to be added to a histogram by the
+    request workers (see collect)
+
+    Args:
+        queue (diskcache.Cache): the cache of the background job manager
+        name (str): the name of the histogram in HISTOGRAMS
+        labels (tuple): the callback and the group
+        value (float): the value
+    """
+    queue.push((name, labels, value), prefix=QUEUE_PREFIX, expire=QUEUE_EXPIRE)
+
+
+def collect(queue):
+    """Adds the values pushed by the background jobs to the histograms
+
+    Args:
+        queue (diskcache.Cache): the cache of the background job manager
+    """
+    while True:
+        key, value = queue.pull(prefix=QUEUE_PREFIX)
+        if key is None:
+            break
+        observe(*value)
+
+
+def record_group_size(size: int):
+    """Records the number of filtered properties of the running callback,
+    does nothing outside of an instrumented callback"""
+    record = _current.get()
+    if record is not None:
+        record["group_size"] = size
+
+
+def count_traces(output):
+    """Returns the number of traces of the first figure of the output of a
+    callback, None if it has no figure (or a partial update)"""
+    outputs = output if isinstance(output, (tuple, list)) else [output]
+    for value in outputs:
+        if isinstance(value, go.Figure):
+            return len(value.data)
+        if isinstance(value, dict) and isinstance(value.get("data"), (list, tuple)):
+            return len(value["data"])
+    return None
+
+
+def instrument(function, group: str = "", queue=None):
+    """Wraps a callback to record its wall time, the number of filtered
+    properties, the number of traces and the size of its response
+
+    Args:
+        function (callable): the callback
+        group (str, optional): the group of the callback. Defaults to "".
+        queue (diskcache.Cache, optional): for the background callbacks,
+            the cache of the job manager. Their jobs run in subprocesses so
+            the values are pushed to it and recorded by the request workers
+            (the size of their response isn't recorded). Defaults to None.
+
+    Returns:
+        callable: the instrumented callback, or the callback itself if the
+            metrics are disabled
+    """
+    if not ENABLED:
+        return function
+
+    labels = (function.__name__, group)
+    record = observe if queue is None else functools.partial(push, queue)
+
+    @functools.wraps(function)
+    def instrumented(*args):
+        recorded = {}
+        token = _current.set(recorded)
+        start = time.perf_counter()
+        try:
+            output = function(*args)
+        finally:
+            record(
+                "htm_dashboard_callback_duration_seconds",
+                labels,
+                time.perf_counter() - start,
+            )
+            _current.reset(token)
+            if "group_size" in recorded:
+                record(
+                    "htm_dashboard_callback_group_size",
+                    labels,
+                    recorded["group_size"],
+                )
+
+        nb_traces = count_traces(output)
+        if nb_traces is not None:
+            record("htm_dashboard_callback_traces", labels, nb_traces)
+        if flask.has_request_context():
+            flask.g.metrics_labels = labels
+        return output
+
+    return instrumented
+
+
+def render():
+    """Returns the histograms in the Prometheus text format"""
+    lines = []
+    with _lock:
+        for name, histogram in HISTOGRAMS.items():
+            lines.append(f"# HELP {name} {histogram['help']}")
+            lines.append(f"# TYPE {name} histogram")
+            for (callback, group), series in sorted(histogram["series"].items()):
+                labels = f'callback="{callback}",group="{group}"'
+                for bound, count in zip(histogram["buckets"], series):
+                    lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {count}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {series[-1]}')
+                lines.append(f"{name}_sum{{{labels}}} {series[-2]:g}")
+                lines.append(f"{name}_count{{{labels}}} {series[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def configure_metrics(app, queue=None):
+    """Records the size of the callback responses and exposes the
+    histograms on /metrics. Metrics are per worker process.
+
+    Args:
+        app (dash.Dash): the Dash app
+        queue (diskcache.Cache, optional): the cache of the background job
+            manager, the values pushed by the jobs are collected when their
+            results are polled and on /metrics. Defaults to None.
+    """
+    if not ENABLED:
+        return
+    server = app.server
+    update_path = app.config.routes_pathname_prefix + "_dash-update-component"
+
+    # registered after configure_server: runs before the compression
+    @server.after_request
+    def record_response_bytes(response):
+        if flask.request.path != update_path:
+            return response
+        # the background callbacks are polled with their cacheKey
+        if queue is not None and "cacheKey" in flask.request.args:
+            collect(queue)
+        labels = getattr(flask.g, "metrics_labels", None)
+        if labels is not None:
+            observe(
+                "htm_dashboard_callback_response_bytes",
+                labels,
+                response.calculate_content_length() or 0,
+            )
+        return response
+
+    @server.route("/metrics")
+    def metrics():
+        if queue is not None:
+            collect(queue)
+        return flask.Response(render(), mimetype="text/plain; version=0.0.4")
@@ -1,15 +1,12 @@
 import dash_bootstrap_components as dbc
 from dash import html
 
+from . import groups
+
 
 def make_form(property_type: str):
 
-    if property_type == "diffusivity":
-        pre_exp_label = "D_0 (m2/s)"
-    elif property_type == "solubility":
-        pre_exp_label = "S_0"
-    elif property_type == "recombination_coeff":
-        pre_exp_label = "Kr_0 (m4/s)"
+    pre_exp_label = groups.pre_exp_label(property_type)
 
     preexponential_input = html.Div(
         [
@@ -28,7 +25,7 @@ def make_form(property_type: str):
 
     activation_energy_input = html.Div(
         [
-            dbc.Label("E_D (eV)", width=2),
+            dbc.Label(groups.act_energy_label(property_type), width=2),
             dbc.Col(
                 dbc.Input(
                     type="number",
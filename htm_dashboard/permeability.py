@@ -0,0 +1,158 @@
+import os
+
+import h_transport_materials as htm
+import numpy as np
+
+from . import statistics
+
+
+# which diffusivities and solubilities are combined:
+# "material": all the pairs with the same material and isotope
+# "author": only the pairs from the same author
+# "year": only the pairs from the same author and year
+PAIRING = os.environ.get("HTM_DASHBOARD_PERMEABILITY_PAIRING", "material")
+
+pairing_to_keys = {
+    "material": ("material", "isotope"),
+    "author": ("material", "isotope", "author"),
+    "year": ("material", "isotope", "author", "year"),
+}
+
+solubility_to_permeability_units = {
+    "m-3 Pa-1/2": "m-1 s-1 Pa-1/2",
+    "m-3 Pa-1": "m-1 s-1 Pa-1",
+}
+
+
+def make_index(properties, keys):
+    """Makes a hash index of properties
+
+    Args:
+        properties (list): the properties
+        keys (tuple): the attributes the properties are indexed by
+
+    Returns:
+        dict: the indices of the properties (np.ndarray) for each value of
+            the keys (tuple). Strings are lowercase.
+    """
+    index = {}
+    for i, prop in enumerate(properties):
+        key = tuple(_normalise(getattr(prop, attr)) for attr in keys)
+        index.setdefault(key, []).append(i)
+    return {key: np.array(indices) for key, indices in index.items()}
+
+
+def _normalise(value):
+    if isinstance(value, str):
+        return value.lower()
+    return value
+
+
+def join(diffusivities, solubilities, pairing="material"):
+    """Finds all the pairs of diffusivities and solubilities with
+    overlapping temperature ranges (hash join)
+
+    Args:
+        diffusivities (list): the diffusivities
+        solubilities (list): the solubilities
+        pairing (str, optional): "material", "author" or "year".
+            Defaults to "material".
+
+    Returns:
+        np.ndarray, np.ndarray: the indices of the diffusivities and of
+            the solubilities of each pair
+    """
+    keys = pairing_to_keys[pairing]
+    solubilities_index = make_index(solubilities, keys)
+    d_indices, s_indices = [np.empty(0, dtype=int)], [np.empty(0, dtype=int)]
+    for key, d_index in make_index(diffusivities, keys).items():
+        s_index = solubilities_index.get(key)
+        if s_index is None:
+            continue
+        d_indices.append(np.repeat(d_index, len(s_index)))
+        s_indices.append(np.tile(s_index, len(d_index)))
+    d_indices, s_indices = np.concatenate(d_indices), np.concatenate(s_indices)
+
+    d_arrays = statistics.to_arrays(diffusivities)
+    s_arrays = statistics.to_arrays(solubilities)
+    overlap = np.maximum(
+        d_arrays["range_low"][d_indices], s_arrays["range_low"][s_indices]
+    ) < np.minimum(d_arrays["range_high"][d_indices], s_arrays["range_high"][s_indices])
+    return d_indices[overlap], s_indices[overlap]
+
+
+def make_permeabilities(diffusivities, solubilities, pairing="material"):
+    """Computes permeabilities P = D x S from diffusivities and solubilities
+    of the same material and isotope. The pre-exponential factors are
+    multiplied, the activation energies added and the temperature range is
+    the overlap of both ranges.
+
+    Args:
+        diffusivities (list): the diffusivities
+        solubilities (list): the solubilities
+        pairing (str, optional): "material", "author" or "year".
+            Defaults to "material".
+
+    Returns:
+        htm.PropertiesGroup: the permeabilities
+    """
+    d_indices, s_indices = join(diffusivities, solubilities, pairing)
+
+    d_arrays = statistics.to_arrays(diffusivities)
+    s_arrays = statistics.to_arrays(solubilities)
+    pre_exp = d_arrays["pre_exp"][d_indices] * s_arrays["pre_exp"][s_indices]
+    act_energy = d_arrays["act_energy"][d_indices] + s_arrays["act_energy"][s_indices]
+    range_low = np.maximum(
+        d_arrays["range_low"][d_indices], s_arrays["range_low"][s_indices]
+    )
+    range_high = np.minimum(
+        d_arrays["range_high"][d_indices], s_arrays["range_high"][s_indices]
+    )
+
+    permeabilities = htm.PropertiesGroup()
+    for i, (d_index, s_index) in enumerate(zip(d_indices, s_indices)):
+        D, S = diffusivities[d_index], solubilities[s_index]
+        permeabilities.append(
+            make_permeability(
+                D, S, pre_exp[i], act_energy[i], (range_low[i], range_high[i])
+            )
+        )
+    return permeabilities
+
+
+def make_permeability(D, S, pre_exp, act_energy, range):
+    permeability = htm.Permeability(
+        pre_exp=pre_exp,
+        act_energy=act_energy,
+        material=D.material,
+        isotope=D.isotope,
+        range=range,
+        note="D: {} ({}), S: {} ({})".format(
+            D.author.capitalize(), D.year, S.author.capitalize(), S.year
+        ),
+    )
+    if D.author == S.author:
+        permeability.author = D.author
+    else:
+        permeability.author = f"{D.author}/{S.author}"
+    permeability.year = max(D.year, S.year)
+    if D.bibsource is not None and D.bibsource is S.bibsource:
+        permeability.bibsource = D.bibsource
+    else:
+        permeability.source = permeability.note
+    permeability.units = solubility_to_permeability_units[S.units]
+    permeability.diffusivity = D
+    permeability.solubility = S
+    return permeability
+
+
+permeabilities = make_permeabilities(htm.diffusivities, htm.solubilities, PAIRING)
+
+
+def refresh():
+    """Recomputes the permeabilities after diffusivities or solubilities
+    were added. Permeabilities added by users are kept."""
+    added = [prop for prop in permeabilities if not hasattr(prop, "diffusivity")]
+    permeabilities[:] = (
+        make_permeabilities(htm.diffusivities, htm.solubilities, PAIRING) + added
+    )
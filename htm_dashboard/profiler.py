@@ -0,0 +1,124 @@
+import cProfile
+import functools
+import hashlib
+import json
+import os
+import re
+import time
+
+import dash
+import flask
+
+
+# directory of the .prof files, profiling is disabled if not set
+PROFILE_DIR = os.environ.get("HTM_DASHBOARD_PROFILE_DIR")
+# callbacks always profiled: "all" or comma separated names of callbacks
+# or "<callback>:<group>" (ex: "update_graph:diffusivity,make_citations_figure")
+PROFILE = os.environ.get("HTM_DASHBOARD_PROFILE", "")
+# requests with a X-HTM-Profile header equal to this token are profiled
+PROFILE_TOKEN = os.environ.get("HTM_DASHBOARD_PROFILE_TOKEN")
+
+PROFILE_HEADER = "X-HTM-Profile"
+
+# ids of the components describing the filter state of a tab
+FILTER_IDS = ["material_filter", "isotope_filter", "author_filter", "year_filter"]
+
+
+def is_profiled(name: str, group: str):
+    """Checks if a call of a callback should be profiled
+
+    Args:
+        name (str): the name of the callback
+        group (str): the group of the callback
+
+    Returns:
+        bool: True if the callback is selected by PROFILE or the request
+            has the profiling header
+    """
+    targets = [target.strip() for target in PROFILE.split(",") if target.strip()]
+    if "all" in targets or name in targets or f"{name}:{group}" in targets:
+        return True
+    return (
+        PROFILE_TOKEN is not None
+        and flask.has_request_context()
+        and flask.request.headers.get(PROFILE_HEADER) == PROFILE_TOKEN
+    )
+
+
+def filter_state():
+    """Returns the filters of the running callback (inputs and states of
+    the filter components or of the filters_{group} store)
+
+    Returns:
+        dict: the filters by name ("material", "isotope", "author", "year")
+    """
+    try:
+        values = {**dash.callback_context.states, **dash.callback_context.inputs}
+    except dash.exceptions.MissingCallbackContextException:
+        return {}
+    filters = {}
+    for key, value in values.items():
+        component_id = key.rsplit(".", 1)[0]
+        if component_id.startswith("filters_") and isinstance(value, dict):
+            for name in ["material", "isotope", "author", "year"]:
+                filters[name] = value.get(name)
+        for filter_id in FILTER_IDS:
+            if component_id.startswith(filter_id + "_") and key.endswith(".value"):
+                filters[filter_id.split("_")[0]] = value
+    return filters
+
+
+def make_filename(name: str, group: str, filters: dict):
+    """Makes the name of a .prof file from the callback and its filters.
+    Long lists of authors are replaced by their number and a hash of the
+    whole filter state keeps the names unique.
+
+    Returns:
+        str: the file name
+    """
+    parts = [time.strftime("%Y%m%dT%H%M%S"), name, group]
+    if filters.get("material"):
+        parts.append("+".join(filters["material"][:5]))
+    if filters.get("isotope"):
+        parts.append("".join(filters["isotope"]))
+    if filters.get("author") is not None:
+        parts.append("{}authors".format(len(filters["author"])))
+    if filters.get("year"):
+        parts.append("-".join(str(year) for year in filters["year"]))
+    digest = hashlib.sha1(json.dumps(filters, sort_keys=True).encode()).hexdigest()
+    parts.append(digest[:8])
+    filename = re.sub(r"[^A-Za-z0-9_.+-]", "", "_".join(part for part in parts if part))
+    return filename[:200] + ".prof"
+
+
+def profile(function, group: str = ""):
+    """Wraps a callback so that the selected calls run under cProfile and
+    are dumped in PROFILE_DIR (open them with snakeviz or pstats)
+
+    Args:
+        function (callable): the callback
+        group (str, optional): the group of the callback. Defaults to "".
+
+    Returns:
+        callable: the wrapped callback, or the callback itself if profiling
+            is disabled
+    """
+    if PROFILE_DIR is None:
+        return function
+
+    name = function.__name__
+
+    @functools.wraps(function)
+    def profiled(*args):
+        if not is_profiled(name, group):
+            return function(*args)
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(function, *args)
+        finally:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            profiler.dump_stats(
+                os.path.join(PROFILE_DIR, make_filename(name, group, filter_state()))
+            )
+
+    return profiled
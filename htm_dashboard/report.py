@@ -0,0 +1,297 @@
+"""Renders a report (graph, table, citations and pie charts) for every
+material of every group.
+
+    python -m htm_dashboard.report --output reports --workers 4
+    python -m htm_dashboard.report --groups diffusivity --materials tungsten,nickel
+
+Reports are rendered in parallel by a process pool. A manifest keeps a hash
+of the properties of each report so that only the reports whose data
+changed are rendered again.
+"""
+import argparse
+import concurrent.futures
+import hashlib
+import html
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .callbacks import create_update_table_data_function
+from .graph import (
+    make_group_of_properties,
+    make_graph,
+    make_citations_graph,
+    make_piechart_isotopes,
+    make_piechart_author,
+)
+from .groups import GROUPS
+from .tab import materials_options, isotope_options, make_table_labels, TABLE_KEYS
+from . import dataset
+
+
+MANIFEST = "manifest.json"
+
+# changing it renders all the reports again
+REPORT_VERSION = 1
+
+
+def filter_material(group: str, material: str):
+    """Returns all the properties of a group for a material"""
+    return make_group_of_properties(
+        type_of_prop=group,
+        materials=[material],
+        authors=dataset.author_options(group, materials=[material]),
+        isotopes=isotope_options,
+    )
+
+
+def hash_properties(properties):
+    """Returns a hash of everything shown in a report of properties
+
+    Args:
+        properties (list): the properties
+
+    Returns:
+        str: the hexadecimal sha1
+    """
+    sha1 = hashlib.sha1()
+    for prop in properties:
+        sha1.update(
+            repr(
+                (
+                    prop.pre_exp,
+                    prop.act_energy,
+                    prop.range,
+                    prop.author,
+                    prop.year,
+                    prop.isotope,
+                    prop.source,
+                    prop.doi,
+                    getattr(prop, "units", None),
+                )
+            ).encode()
+        )
+        if prop.data_T is not None:
+            sha1.update(np.asarray(prop.data_T, dtype=float).tobytes())
+            sha1.update(np.asarray(prop.data_y, dtype=float).tobytes())
+    return sha1.hexdigest()
+
+
+def make_figures(properties):
+    """Returns the figures of a report: the graph, the pie charts and the
+    citations (skipped if Crossref can't be reached)
+
+    Args:
+        properties (list): the properties
+
+    Returns:
+        dict: the plotly figures by name
+    """
+    figures = {
+        "graph": make_graph(properties),
+        "isotopes": make_piechart_isotopes(properties),
+        "authors": make_piechart_author(properties),
+    }
+    try:
+        figures["citations"] = make_citations_graph(properties, per_year=False)
+    except OSError:
+        # citations are fetched from Crossref
+        pass
+    return figures
+
+
+def make_table_data(group: str, material: str):
+    """Returns the rows of the table of a material, as the table callback"""
+    return create_update_table_data_function(group)(
+        None,
+        [material],
+        isotope_options,
+        dataset.author_options(group, materials=[material]),
+        None,
+    )
+
+
+def report_path(output: str, group: str, material: str, fmt: str):
+    if fmt == "html":
+        return os.path.join(output, group, f"{material}.html")
+    return os.path.join(output, group, material)
+
+
+def render_report(group: str, material: str, output: str, fmt: str = "html"):
+    """Renders the report of a material, runs in the worker processes
+
+    Args:
+        group (str): a group of GROUPS
+        material (str): the material
+        output (str): the output directory
+        fmt (str, optional): "html" (one interactive file) or "png" (a
+            directory with the figures, requires kaleido, and the table as
+            CSV). Defaults to "html".
+
+    Returns:
+        str: the path of the report
+    """
+    properties = filter_material(group, material)
+    figures = make_figures(properties)
+    table = pd.DataFrame(make_table_data(group, material), columns=TABLE_KEYS)
+    table.columns = make_table_labels(group)
+
+    path = report_path(output, group, material, fmt)
+    if fmt == "png":
+        os.makedirs(path, exist_ok=True)
+        for name, figure in figures.items():
+            figure.write_image(os.path.join(path, f"{name}.png"))
+        table.to_csv(os.path.join(path, "table.csv"), index=False)
+        return path
+
+    title = "{} of {}".format(GROUPS[group]["name"], material)
+    sections = [f"<h1>{html.escape(title)}</h1>"]
+    for i, (name, figure) in enumerate(figures.items()):
+        sections.append(f"<h2>{name.capitalize()}</h2>")
+        sections.append(
+            figure.to_html(full_html=False, include_plotlyjs="cdn" if i == 0 else False)
+        )
+        if name == "graph":
+            sections.append("<h2>Table</h2>")
+            sections.append(table.to_html(index=False, escape=True))
+    if "citations" not in figures:
+        sections.append("<p>Citations unavailable (Crossref could not be reached)</p>")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(
+            "<html><head><meta charset='utf-8'><title>{}</title></head>"
+            "<body>{}</body></html>".format(html.escape(title), "\n".join(sections))
+        )
+    return path
+
+
+def load_manifest(output: str):
+    try:
+        with open(os.path.join(output, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def write_manifest(output: str, manifest: dict):
+    """Writes the manifest, replacing the previous one atomically"""
+    path = os.path.join(output, MANIFEST)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def write_index(output: str, manifest: dict):
+    """Writes an index.html linking all the reports"""
+    links = [
+        '<li><a href="{}">{}</a></li>'.format(
+            html.escape(os.path.relpath(entry["path"], output)), html.escape(key)
+        )
+        for key, entry in sorted(manifest.items())
+    ]
+    with open(os.path.join(output, "index.html"), "w") as f:
+        f.write("<html><body><ul>{}</ul></body></html>".format("\n".join(links)))
+
+
+def generate_reports(
+    output: str, groups=None, materials=None, fmt="html", workers=None, force=False
+):
+    """Renders the reports of all the material x group combinations whose
+    data changed since the last run
+
+    Args:
+        output (str): the output directory
+        groups (list, optional): the groups. Defaults to None (all groups).
+        materials (list, optional): the materials. Defaults to None
+            (tab.materials_options).
+        fmt (str, optional): "html" or "png". Defaults to "html".
+        workers (int, optional): number of processes. Defaults to None
+            (number of CPUs).
+        force (bool, optional): renders all the reports. Defaults to False.
+
+    Returns:
+        list: the keys ("<group>/<material>") of the rendered reports
+    """
+    groups = groups or list(GROUPS)
+    materials = materials or materials_options
+    manifest = load_manifest(output)
+
+    jobs = {}
+    for group in groups:
+        for material in materials:
+            properties = filter_material(group, material)
+            if len(properties) == 0:
+                continue
+            key = f"{group}/{material}"
+            digest = hash_properties(properties)
+            entry = manifest.get(key, {})
+            if (
+                not force
+                and entry.get("hash") == digest
+                and entry.get("format") == fmt
+                and entry.get("version") == REPORT_VERSION
+                and os.path.exists(entry.get("path", ""))
+            ):
+                continue
+            jobs[key] = (group, material, digest)
+
+    os.makedirs(output, exist_ok=True)
+    errors = []
+    try:
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            futures = {
+                executor.submit(render_report, group, material, output, fmt): key
+                for key, (group, material, _) in jobs.items()
+            }
+            for future in concurrent.futures.as_completed(futures):
+                key = futures[future]
+                try:
+                    path = future.result()
+                except Exception as error:
+                    errors.append(error)
+                    continue
+                manifest[key] = {
+                    "hash": jobs[key][2],
+                    "format": fmt,
+                    "version": REPORT_VERSION,
+                    "path": path,
+                }
+                # saved after every report so that an interrupted run
+                # keeps the reports already rendered
+                write_manifest(output, manifest)
+    finally:
+        write_manifest(output, manifest)
+        write_index(output, manifest)
+    if errors:
+        raise errors[0]
+    return list(jobs)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--output", default="reports")
+    parser.add_argument("--groups", help="comma separated groups (default: all)")
+    parser.add_argument("--materials", help="comma separated materials (default: all)")
+    parser.add_argument("--format", choices=["html", "png"], default="html")
+    parser.add_argument("--workers", type=int, help="default: number of CPUs")
+    parser.add_argument(
+        "--force", action="store_true", help="render the unchanged reports too"
+    )
+    args = parser.parse_args(args)
+
+    rendered = generate_reports(
+        args.output,
+        groups=args.groups.split(",") if args.groups else None,
+        materials=args.materials.split(",") if args.materials else None,
+        fmt=args.format,
+        workers=args.workers,
+        force=args.force,
+    )
+    print(f"{len(rendered)} reports rendered in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
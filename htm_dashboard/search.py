@@ -0,0 +1,111 @@
+import bisect
+import difflib
+import os
+import re
+import unicodedata
+
+
+# maximum number of matches sent to a dropdown
+SEARCH_LIMIT = int(os.environ.get("HTM_DASHBOARD_SEARCH_LIMIT", 20))
+
+
+def normalize(name: str):
+    """Normalizes a name for searching: no accents, no case, words
+    separated by single spaces (ex: "Völkl-Alefeld" -> "volkl alefeld")
+
+    Args:
+        name (str): the name
+
+    Returns:
+        str: the normalized name
+    """
+    decomposed = unicodedata.normalize("NFKD", str(name))
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(re.split(r"[^0-9a-z]+", stripped.casefold())).strip()
+
+
+def make_index(names):
+    """Makes a search index over names
+
+    Args:
+        names (list): the names
+
+    Returns:
+        dict: "names", "normalized" (the normalized names) and "words"
+            (sorted (word, position of the name) of all the words of
+            the normalized names, for prefix searches)
+    """
+    names = list(names)
+    normalized = [normalize(name) for name in names]
+    words = sorted(
+        (word, position)
+        for position, name in enumerate(normalized)
+        for word in name.split()
+    )
+    return {"names": names, "normalized": normalized, "words": words}
+
+
+def search(index, query: str, limit: int = SEARCH_LIMIT):
+    """Returns the names matching a query, best matches first: names
+    starting with the query, names with a word starting with the query,
+    names containing it and finally close matches (typos)
+
+    Args:
+        index (dict): the output of make_index
+        query (str): the searched text
+        limit (int, optional): maximum number of names. Defaults to
+            SEARCH_LIMIT.
+
+    Returns:
+        list: the matching names
+    """
+    query = normalize(query or "")
+    if not query:
+        return index["names"][:limit]
+    normalized = index["normalized"]
+
+    words = index["words"]
+    word_matches = []
+    for word, position in words[bisect.bisect_left(words, (query,)) :]:
+        if not word.startswith(query):
+            break
+        word_matches.append(position)
+
+    def exact_matches():
+        # names starting with the query, names with a word starting with it
+        # and names containing it
+        yield from sorted(
+            (i for i in word_matches if normalized[i].startswith(query)),
+            key=normalized.__getitem__,
+        )
+        yield from word_matches
+        yield from (i for i, name in enumerate(normalized) if query in name)
+
+    def close_matches():
+        # typos: names or words of names close to the query
+        for match in difflib.get_close_matches(query, normalized, n=limit):
+            yield normalized.index(match)
+        close_words = difflib.get_close_matches(
+            query, list({word for word, _ in words}), n=limit
+        )
+        for word in close_words:
+            start = bisect.bisect_left(words, (word,))
+            while start < len(words) and words[start][0] == word:
+                yield words[start][1]
+                start += 1
+
+    positions = first_unique(exact_matches(), limit) or first_unique(
+        close_matches(), limit
+    )
+    return [index["names"][i] for i in positions]
+
+
+def first_unique(values, limit):
+    """Returns the first limit unique values of an iterable"""
+    unique = []
+    for value in values:
+        if value not in unique:
+            unique.append(value)
+            if len(unique) >= limit:
+                break
+    return unique
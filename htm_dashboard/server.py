@@ -0,0 +1,81 @@
+import os
+
+import flask
+
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
+
+# Compression algorithms by order of preference ("br", "gzip", "deflate")
+# or "none" to disable compression
+COMPRESSION = os.environ.get("HTM_DASHBOARD_COMPRESSION", "br,gzip")
+COMPRESS_LEVEL = int(os.environ.get("HTM_DASHBOARD_COMPRESS_LEVEL", 6))
+COMPRESS_BR_LEVEL = int(os.environ.get("HTM_DASHBOARD_COMPRESS_BR_LEVEL", 4))
+COMPRESS_MIN_SIZE = int(os.environ.get("HTM_DASHBOARD_COMPRESS_MIN_SIZE", 500))
+# compressed content types: the pages, the scripts, the callback and API
+# responses (JSON and Arrow streams of api.py)
+COMPRESS_MIMETYPES = [
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "application/vnd.apache.arrow.stream",
+]
+
+# max-age (in seconds) of the Cache-Control headers of the static assets
+ASSETS_MAX_AGE = int(os.environ.get("HTM_DASHBOARD_ASSETS_MAX_AGE", 7 * 24 * 3600))
+
+
+def configure_server(app):
+    """Sets up response compression and caching headers on the Flask
+    server of a Dash app.
+
+    Responses are compressed with the algorithms of COMPRESSION (skipped if
+    Flask-Compress isn't installed). Static assets and component suites get
+    a Cache-Control max-age. The layout isn't fingerprinted so it gets an
+    ETag and is revalidated on every visit (no-cache).
+
+    Args:
+        app (dash.Dash): the Dash app
+    """
+    server = app.server
+    algorithms = [
+        algo.strip() for algo in COMPRESSION.split(",") if algo.strip() != "none"
+    ]
+    if algorithms and Compress is not None:
+        server.config["COMPRESS_ALGORITHM"] = algorithms
+        server.config["COMPRESS_LEVEL"] = COMPRESS_LEVEL
+        server.config["COMPRESS_BR_LEVEL"] = COMPRESS_BR_LEVEL
+        server.config["COMPRESS_MIN_SIZE"] = COMPRESS_MIN_SIZE
+        server.config["COMPRESS_MIMETYPES"] = COMPRESS_MIMETYPES
+        Compress(server)
+
+    prefix = app.config.routes_pathname_prefix
+    static_prefixes = (
+        prefix + app.config.assets_url_path.lstrip("/") + "/",
+        prefix + "_dash-component-suites/",
+    )
+    layout_path = prefix + "_dash-layout"
+
+    # after_request functions run in reverse order of registration so this
+    # runs before compression and the ETag is computed on the raw content
+    @server.after_request
+    def add_cache_headers(response):
+        if response.status_code != 200 or flask.request.method != "GET":
+            return response
+
+        path = flask.request.path
+        if path.startswith(static_prefixes):
+            response.cache_control.public = True
+            # fingerprinted component suites already have a max-age of 1 year
+            if not response.cache_control.max_age:
+                response.cache_control.max_age = ASSETS_MAX_AGE
+        elif path == layout_path:
+            response.cache_control.no_cache = True
+            response.add_etag()
+            response.make_conditional(flask.request)
+        return response
@@ -0,0 +1,233 @@
+"""Builds a static version of the dashboard for a static host or a CDN.
+
+    python -m htm_dashboard.static_site --output site --workers 4
+
+The figures and the table of every material of every group are precomputed
+and written as JSON shards (site/data/<group>/<material>.<hash>.json) that
+index.html loads on demand. Shard names contain a hash of their properties
+so they can be cached forever, only site/data/index.json must be revalidated.
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+
+import plotly
+
+from .groups import GROUPS
+from .report import filter_material, hash_properties, make_figures, make_table_data
+from .tab import materials_options, make_table_labels, pretty_label, TABLE_KEYS
+
+
+INDEX = "index.html"
+DATA_DIR = "data"
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>H-transport properties</title>
+<script src="https://cdn.plot.ly/plotly-PLOTLYJS_VERSION.min.js"></script>
+<style>
+body {font-family: sans-serif; margin: 2em}
+table {border-collapse: collapse; font-size: small}
+td, th {border: 1px solid #ddd; padding: 4px}
+.pies {display: flex; flex-wrap: wrap}
+</style>
+</head>
+<body>
+<h1>H-transport properties</h1>
+<p>Static version of the dashboard, select a group and a material.</p>
+<select id="group"></select>
+<select id="material"></select>
+<div id="graph"></div>
+<div class="pies"><div id="isotopes"></div><div id="authors"></div></div>
+<div id="citations"></div>
+<table id="table"></table>
+<script>
+let index = null;
+
+function renderTable(shard) {
+  const table = document.getElementById("table");
+  table.innerHTML = "";
+  const header = table.insertRow();
+  for (const column of shard.columns) {
+    const cell = document.createElement("th");
+    cell.textContent = column.name;
+    header.appendChild(cell);
+  }
+  for (const row of shard.table) {
+    const line = table.insertRow();
+    for (const column of shard.columns) {
+      const value = row[column.id] === undefined ? "" : String(row[column.id]);
+      // DOIs are markdown links in the table of the dashboard
+      const link = value.match(/^\[(.*)\]\((https:\/\/doi\.org\/.*)\)$/);
+      const cell = line.insertCell();
+      if (link) {
+        const anchor = document.createElement("a");
+        anchor.textContent = link[1];
+        anchor.href = link[2];
+        cell.appendChild(anchor);
+      } else {
+        cell.textContent = value;
+      }
+    }
+  }
+}
+
+function loadShard() {
+  const group = document.getElementById("group").value;
+  const material = document.getElementById("material").value;
+  fetch("DATA_DIR/" + group + "/" + index.groups[group].materials[material])
+    .then((response) => response.json())
+    .then((shard) => {
+      for (const name of ["graph", "isotopes", "authors", "citations"]) {
+        const element = document.getElementById(name);
+        if (shard.figures[name]) {
+          Plotly.react(element, shard.figures[name].data, shard.figures[name].layout);
+        } else {
+          Plotly.purge(element);
+        }
+      }
+      renderTable(shard);
+    });
+}
+
+function selectGroup() {
+  const select = document.getElementById("material");
+  const group = document.getElementById("group").value;
+  const previous = select.value;
+  select.innerHTML = "";
+  for (const material of Object.keys(index.groups[group].materials)) {
+    select.add(new Option(material, material));
+  }
+  if (previous in index.groups[group].materials) {
+    select.value = previous;
+  }
+  loadShard();
+}
+
+fetch("DATA_DIR/index.json", {cache: "no-cache"})
+  .then((response) => response.json())
+  .then((data) => {
+    index = data;
+    const select = document.getElementById("group");
+    for (const [group, infos] of Object.entries(index.groups)) {
+      select.add(new Option(infos.label, group));
+    }
+    select.onchange = selectGroup;
+    document.getElementById("material").onchange = loadShard;
+    selectGroup();
+  });
+</script>
+</body>
+</html>
+"""
+
+
+def write_shard(group: str, material: str, output: str):
+    """Precomputes the figures and the table of a material and writes them
+    in a JSON shard, runs in the worker processes
+
+    Args:
+        group (str): a group of GROUPS
+        material (str): the material
+        output (str): the output directory
+
+    Returns:
+        str: the file name of the shard, None if the material has no
+            property in this group
+    """
+    properties = filter_material(group, material)
+    if len(properties) == 0:
+        return None
+    filename = "{}.{}.json".format(material, hash_properties(properties)[:12])
+    path = os.path.join(output, DATA_DIR, group, filename)
+    if os.path.exists(path):
+        return filename
+
+    figures = make_figures(properties)
+    shard = {
+        "figures": {name: figure.to_plotly_json() for name, figure in figures.items()},
+        "columns": [
+            {"id": key, "name": label}
+            for key, label in zip(TABLE_KEYS, make_table_labels(group))
+        ],
+        "table": make_table_data(group, material),
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(shard, f, cls=plotly.utils.PlotlyJSONEncoder)
+    return filename
+
+
+def build_site(output: str, groups=None, materials=None, workers=None):
+    """Writes the static site: the shards, data/index.json and index.html.
+    Shards already written with the same properties are kept.
+
+    Args:
+        output (str): the output directory
+        groups (list, optional): the groups. Defaults to None (all groups).
+        materials (list, optional): the materials. Defaults to None
+            (tab.materials_options).
+        workers (int, optional): number of processes. Defaults to None
+            (number of CPUs).
+
+    Returns:
+        dict: the index of the shards
+    """
+    groups = groups or list(GROUPS)
+    materials = materials or materials_options
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        futures = {
+            (group, material): executor.submit(write_shard, group, material, output)
+            for group in groups
+            for material in materials
+        }
+        index = {
+            "groups": {
+                group: {
+                    "label": pretty_label[group],
+                    "materials": {
+                        material: futures[group, material].result()
+                        for material in materials
+                        if futures[group, material].result() is not None
+                    },
+                }
+                for group in groups
+            }
+        }
+
+    os.makedirs(os.path.join(output, DATA_DIR), exist_ok=True)
+    with open(os.path.join(output, DATA_DIR, "index.json"), "w") as f:
+        json.dump(index, f, indent=2)
+    with open(os.path.join(output, INDEX), "w") as f:
+        f.write(
+            PAGE.replace("DATA_DIR", DATA_DIR).replace(
+                "PLOTLYJS_VERSION", plotly.offline.get_plotlyjs_version()
+            )
+        )
+    return index
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--output", default="site")
+    parser.add_argument("--groups", help="comma separated groups (default: all)")
+    parser.add_argument("--materials", help="comma separated materials (default: all)")
+    parser.add_argument("--workers", type=int, help="default: number of CPUs")
+    args = parser.parse_args(args)
+
+    index = build_site(
+        args.output,
+        groups=args.groups.split(",") if args.groups else None,
+        materials=args.materials.split(",") if args.materials else None,
+        workers=args.workers,
+    )
+    nb_shards = sum(len(infos["materials"]) for infos in index["groups"].values())
+    print(f"{nb_shards} shards in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
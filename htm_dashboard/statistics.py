@@ -0,0 +1,372 @@
+import warnings
+
+import h_transport_materials as htm
+import numpy as np
+from scipy.cluster import hierarchy
+from scipy.spatial.distance import squareform
+
+
+def to_arrays(group_of_properties, default_range=(300, 1200)):
+    """Converts the numerical attributes of properties to numpy arrays
+
+    Args:
+        group_of_properties (list): htm properties
+        default_range (tuple, optional): temperature range taken if a
+            property has no range nor data. Defaults to (300, 1200).
+
+    Returns:
+        dict: "pre_exp", "act_energy", "range_low", "range_high" (one value
+            per property), "has_data" (bool per property) and "data_T",
+            "data_y", "data_index" (all the experimental points
+            concatenated and the index of their property)
+    """
+    nb_props = len(group_of_properties)
+    pre_exp = np.empty(nb_props)
+    act_energy = np.empty(nb_props)
+    ranges = np.empty((nb_props, 2))
+    has_data = np.zeros(nb_props, dtype=bool)
+    data_T, data_y, data_index = [], [], []
+    for i, prop in enumerate(group_of_properties):
+        pre_exp[i] = prop.pre_exp
+        act_energy[i] = prop.act_energy
+        ranges[i] = prop.range if prop.range is not None else default_range
+        if prop.data_T is not None:
+            has_data[i] = True
+            data_T.append(prop.data_T)
+            data_y.append(prop.data_y)
+            data_index.append(np.full(len(prop.data_T), i))
+
+    def concatenate(arrays, dtype):
+        if arrays:
+            return np.concatenate(arrays).astype(dtype)
+        return np.empty(0, dtype=dtype)
+
+    return {
+        "pre_exp": pre_exp,
+        "act_energy": act_energy,
+        "range_low": ranges[:, 0],
+        "range_high": ranges[:, 1],
+        "has_data": has_data,
+        "data_T": concatenate(data_T, float),
+        "data_y": concatenate(data_y, float),
+        "data_index": concatenate(data_index, int),
+    }
+
+
+def log_values(arrays, T):
+    """Evaluates the log of all the properties on a temperature grid
+
+    Args:
+        arrays (dict): the output of to_arrays
+        T (np.ndarray): temperatures in K
+
+    Returns:
+        np.ndarray: log(pre_exp * exp(-act_energy / k_B / T)) of shape
+            (nb properties, nb temperatures)
+    """
+    return np.log(arrays["pre_exp"])[:, None] - np.outer(
+        arrays["act_energy"] / htm.k_B, 1 / np.asarray(T)
+    )
+
+
+def values_at(arrays, T):
+    """Evaluates all the properties at some temperatures
+
+    Args:
+        arrays (dict): the output of to_arrays
+        T (float or np.ndarray): temperatures in K
+
+    Returns:
+        np.ndarray, np.ndarray: the values and whether the temperatures
+            are inside the range of the properties, both of shape
+            (nb properties, nb temperatures)
+    """
+    T = np.atleast_1d(np.asarray(T, dtype=float))
+    in_range = (arrays["range_low"][:, None] <= T) & (
+        T <= arrays["range_high"][:, None]
+    )
+    return np.exp(log_values(arrays, T)), in_range
+
+
+def mean(arrays, samples_per_line=5):
+    """Vectorized equivalent of htm.PropertiesGroup.mean: fits an
+    Arrhenius law on the experimental points of the properties that have
+    some and on samples_per_line points of the others.
+
+    Args:
+        arrays (dict): the output of to_arrays
+        samples_per_line (int, optional): number of points taken per
+            property without data. Defaults to 5.
+
+    Returns:
+        float, float: pre-exponential factor, activation energy (eV)
+    """
+    no_data = ~arrays["has_data"]
+    low, high = arrays["range_low"][no_data], arrays["range_high"][no_data]
+    samples_T = low[:, None] + np.outer(high - low, np.linspace(0, 1, samples_per_line))
+    samples_log_y = np.log(arrays["pre_exp"][no_data])[:, None] - (
+        arrays["act_energy"][no_data][:, None] / htm.k_B / samples_T
+    )
+
+    x = np.concatenate((1 / arrays["data_T"], 1 / samples_T.ravel()))
+    y = np.concatenate((np.log(arrays["data_y"]), samples_log_y.ravel()))
+
+    x_mean, y_mean = x.mean(), y.mean()
+    slope = np.sum((x - x_mean) * (y - y_mean)) / np.sum((x - x_mean) ** 2)
+    intercept = y_mean - slope * x_mean
+    return np.exp(intercept), -slope * htm.k_B
+
+
+def refit(arrays):
+    """Refits an Arrhenius law on the experimental points of each property.
+    All the properties are fitted at once by a linear least squares in
+    (1/T, log(y)) space, the sums of each property being computed with
+    np.bincount. Points with y <= 0 are ignored.
+
+    Args:
+        arrays (dict): the output of to_arrays
+
+    Returns:
+        dict: one value per property, nan for properties with less than 2
+            points: "pre_exp", "act_energy", their standard errors
+            "log_pre_exp_std" (of the natural log of pre_exp) and
+            "act_energy_std" (nan with 2 points), "nb_points" and
+            "deviation", the maximum of |log10(refit / published)| over
+            the temperatures of the points
+    """
+    nb_props = len(arrays["pre_exp"])
+    valid = (arrays["data_y"] > 0) & (arrays["data_T"] > 0)
+    index = arrays["data_index"][valid]
+    x = 1 / arrays["data_T"][valid]
+    y = np.log(arrays["data_y"][valid])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        n = np.bincount(index, minlength=nb_props)
+        x_mean = np.bincount(index, weights=x, minlength=nb_props) / n
+        y_mean = np.bincount(index, weights=y, minlength=nb_props) / n
+        # centered sums for numerical stability (1/T ~ 1e-3)
+        dx = x - x_mean[index]
+        dy = y - y_mean[index]
+        s_xx = np.bincount(index, weights=dx * dx, minlength=nb_props)
+        s_xy = np.bincount(index, weights=dx * dy, minlength=nb_props)
+
+        fitted = (n >= 2) & (s_xx > 0)
+        slope = np.where(fitted, s_xy / s_xx, np.nan)
+        intercept = y_mean - slope * x_mean
+        residuals = dy - slope[index] * dx
+        variance = np.where(
+            n > 2,
+            np.bincount(index, weights=residuals**2, minlength=nb_props) / (n - 2),
+            np.nan,
+        )
+        slope_std = np.sqrt(variance / s_xx)
+        intercept_std = np.sqrt(variance * (1 / n + x_mean**2 / s_xx))
+
+        # log(refit / published) is linear in 1/T: its maximum is at the
+        # lowest or highest temperature of the points
+        x_min = np.full(nb_props, np.nan)
+        x_max = np.full(nb_props, np.nan)
+        if len(index):
+            order = np.argsort(index, kind="stable")
+            starts = np.flatnonzero(np.diff(index[order], prepend=-1))
+            x_min[index[order][starts]] = np.minimum.reduceat(x[order], starts)
+            x_max[index[order][starts]] = np.maximum.reduceat(x[order], starts)
+        delta_intercept = intercept - np.log(arrays["pre_exp"])
+        delta_slope = slope + arrays["act_energy"] / htm.k_B
+        deviation = np.maximum(
+            np.abs(delta_intercept + delta_slope * x_min),
+            np.abs(delta_intercept + delta_slope * x_max),
+        ) / np.log(10)
+
+    return {
+        "pre_exp": np.exp(intercept),
+        "act_energy": -slope * htm.k_B,
+        "log_pre_exp_std": intercept_std,
+        "act_energy_std": slope_std * htm.k_B,
+        "nb_points": n,
+        "deviation": deviation,
+    }
+
+
+def spread(arrays, T, chunk_size=10000):
+    """Computes the minimum and maximum values of the properties on a
+    temperature grid. Each property only contributes inside its range.
+    Properties are evaluated by chunks to bound memory usage.
+
+    Args:
+        arrays (dict): the output of to_arrays
+        T (np.ndarray): temperatures in K
+        chunk_size (int, optional): number of properties evaluated at
+            once. Defaults to 10000.
+
+    Returns:
+        np.ndarray, np.ndarray: the min and max values (nan where no
+            property is defined)
+    """
+    log_min = np.full(len(T), np.inf)
+    log_max = np.full(len(T), -np.inf)
+    for start in range(0, len(arrays["pre_exp"]), chunk_size):
+        chunk = {
+            key: arrays[key][start : start + chunk_size]
+            for key in ["pre_exp", "act_energy", "range_low", "range_high"]
+        }
+        values = log_values(chunk, T)
+        in_range = (chunk["range_low"][:, None] <= T) & (
+            T <= chunk["range_high"][:, None]
+        )
+        log_min = np.minimum(log_min, np.where(in_range, values, np.inf).min(axis=0))
+        log_max = np.maximum(log_max, np.where(in_range, values, -np.inf).max(axis=0))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        low = np.where(np.isfinite(log_min), np.exp(log_min), np.nan)
+        high = np.where(np.isfinite(log_max), np.exp(log_max), np.nan)
+    return low, high
+
+
+def mean_curve(arrays, T=None):
+    """Computes the mean curve of properties and their spread
+
+    Args:
+        arrays (dict): the output of to_arrays
+        T (np.ndarray, optional): temperatures in K. Defaults to 500
+            points between 300 and 1200 K.
+
+    Returns:
+        dict: "T", "pre_exp", "act_energy", "value" (the mean curve) and
+            "low", "high" (the spread of the properties)
+    """
+    if T is None:
+        T = np.linspace(300, 1200, num=500)
+    pre_exp, act_energy = mean(arrays)
+    low, high = spread(arrays, T)
+    return {
+        "T": T,
+        "pre_exp": pre_exp,
+        "act_energy": act_energy,
+        "value": pre_exp * np.exp(-act_energy / htm.k_B / T),
+        "low": low,
+        "high": high,
+    }
+
+
+def envelope(arrays, T, percentiles=(10, 50, 90), max_elements=5_000_000):
+    """Computes percentiles of the values of properties on a temperature
+    grid. At each temperature, only the properties whose range contains
+    it are taken into account.
+
+    The (nb properties x nb temperatures) matrix is evaluated by chunks of
+    temperatures so that at most max_elements values are held in memory.
+
+    Args:
+        arrays (dict): the output of to_arrays
+        T (np.ndarray): temperatures in K
+        percentiles (tuple, optional): the percentiles to compute.
+            Defaults to (10, 50, 90).
+        max_elements (int, optional): maximum size of a chunk.
+            Defaults to 5e6.
+
+    Returns:
+        np.ndarray, np.ndarray: the percentiles of shape
+            (nb percentiles, nb temperatures), nan where no property is
+            defined, and the number of properties defined at each
+            temperature
+    """
+    T = np.asarray(T, dtype=float)
+    nb_props = len(arrays["pre_exp"])
+    result = np.full((len(percentiles), len(T)), np.nan)
+    count = np.zeros(len(T), dtype=int)
+    if nb_props == 0:
+        return result, count
+
+    chunk_size = max(1, max_elements // nb_props)
+    for start in range(0, len(T), chunk_size):
+        T_chunk = T[start : start + chunk_size]
+        values = log_values(arrays, T_chunk)
+        in_range = (arrays["range_low"][:, None] <= T_chunk) & (
+            T_chunk <= arrays["range_high"][:, None]
+        )
+        values[~in_range] = np.nan
+        count[start : start + chunk_size] = in_range.sum(axis=0)
+        with warnings.catch_warnings():
+            # temperatures where no property is defined give nan
+            warnings.simplefilter("ignore", RuntimeWarning)
+            result[:, start : start + chunk_size] = np.exp(
+                np.nanpercentile(values, percentiles, axis=0)
+            )
+    return result, count
+
+
+def temperature_grid(arrays, nb_points=200):
+    """Returns a temperature grid covering the ranges of all properties
+
+    Args:
+        arrays (dict): the output of to_arrays
+        nb_points (int, optional): number of temperatures. Defaults to 200.
+
+    Returns:
+        np.ndarray: the temperatures in K
+    """
+    if len(arrays["pre_exp"]) == 0:
+        return np.linspace(300, 1200, num=nb_points)
+    return np.linspace(
+        arrays["range_low"].min(), arrays["range_high"].max(), num=nb_points
+    )
+
+
+def discrepancy(arrays, chunk_size=1000):
+    """Computes the pairwise discrepancy between properties: the maximum of
+    |log10(y_i(T) / y_j(T))| over the overlap of their temperature ranges.
+
+    log(y_i / y_j) is linear in 1/T so its maximum is reached at one of the
+    bounds of the overlap and the matrix is computed without evaluating
+    the properties. Rows are computed by chunks to bound memory usage.
+
+    Args:
+        arrays (dict): the output of to_arrays
+        chunk_size (int, optional): number of rows computed at once.
+            Defaults to 1000.
+
+    Returns:
+        np.ndarray: the (nb properties x nb properties) discrepancy matrix
+            in decades, nan for pairs with no overlapping range
+    """
+    log_pre_exp = np.log10(arrays["pre_exp"])
+    slope = arrays["act_energy"] / htm.k_B / np.log(10)
+    low, high = arrays["range_low"], arrays["range_high"]
+
+    nb_props = len(log_pre_exp)
+    matrix = np.empty((nb_props, nb_props))
+    for start in range(0, nb_props, chunk_size):
+        rows = slice(start, start + chunk_size)
+        overlap_low = np.maximum(low[rows, None], low)
+        overlap_high = np.minimum(high[rows, None], high)
+        delta_pre_exp = log_pre_exp[rows, None] - log_pre_exp
+        delta_slope = slope[rows, None] - slope
+        matrix[rows] = np.maximum(
+            np.abs(delta_pre_exp - delta_slope / overlap_low),
+            np.abs(delta_pre_exp - delta_slope / overlap_high),
+        )
+        matrix[rows][overlap_low > overlap_high] = np.nan
+    return matrix
+
+
+def cluster_order(matrix):
+    """Orders properties so that similar ones are next to each other
+    (average linkage hierarchical clustering). Pairs with no overlap are
+    considered as far apart as the most different pair.
+
+    Args:
+        matrix (np.ndarray): the output of discrepancy
+
+    Returns:
+        np.ndarray: the indices of the properties in the new order
+    """
+    if len(matrix) < 3:
+        return np.arange(len(matrix))
+    finite = np.isfinite(matrix)
+    distances = np.where(finite, matrix, matrix[finite].max() if finite.any() else 1)
+    distances = (distances + distances.T) / 2
+    np.fill_diagonal(distances, 0)
+    linkage = hierarchy.linkage(squareform(distances, checks=False), method="average")
+    return hierarchy.leaves_list(linkage)
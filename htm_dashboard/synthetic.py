@@ -0,0 +1,91 @@
+import os
+
+import h_transport_materials as htm
+import numpy as np
+
+
+# number of synthetic properties replacing the database of each group, 0 to
+# use the HTM database
+SIZE = int(os.environ.get("HTM_DASHBOARD_SYNTHETIC_SIZE", 0))
+SEED = int(os.environ.get("HTM_DASHBOARD_SYNTHETIC_SEED", 0))
+
+
+def make_properties(group_infos: dict, nb_properties: int, seed: int = 0):
+    """Generates a synthetic group of properties for scale testing.
+
+    Materials, isotopes, years, temperature ranges, the share of properties
+    with experimental points and the number of points are resampled from
+    the real properties of the group (or of the whole HTM database if the
+    group is empty). Pre-exponential factors are log-normal and activation
+    energies normal with the statistics of the real properties. Authors
+    follow a Zipf-like distribution, about one author for 20 properties.
+
+    Args:
+        group_infos (dict): the entry of the group in GROUPS
+        nb_properties (int): the number of properties
+        seed (int, optional): the seed of the random generator. Defaults to 0.
+
+    Returns:
+        htm.PropertiesGroup: the properties
+    """
+    rng = np.random.default_rng(seed)
+    real = group_infos["database"] if len(group_infos["database"]) else htm.database
+
+    def resample(values):
+        return np.asarray(values)[rng.integers(len(values), size=nb_properties)]
+
+    materials = resample([prop.material for prop in real])
+    isotopes = resample([prop.isotope for prop in real])
+    years = resample([prop.year for prop in real])
+
+    nb_authors = max(1, nb_properties // 20)
+    weights = 1 / np.arange(1, nb_authors + 1) ** 1.1
+    authors = rng.choice(nb_authors, size=nb_properties, p=weights / weights.sum())
+
+    log_pre_exp = np.log10([prop.pre_exp for prop in real])
+    pre_exp = 10 ** rng.normal(log_pre_exp.mean(), log_pre_exp.std(), nb_properties)
+    act_energy = [prop.act_energy for prop in real]
+    act_energy = rng.normal(np.mean(act_energy), np.std(act_energy), nb_properties)
+
+    ranges = np.array([prop.range for prop in real if prop.range is not None])
+    if len(ranges) == 0:
+        ranges = np.array([[300.0, 1200.0]])
+    ranges = ranges[rng.integers(len(ranges), size=nb_properties)]
+
+    nb_points = [len(prop.data_T) for prop in real if prop.data_T is not None]
+    if nb_points:
+        has_data = rng.random(nb_properties) < len(nb_points) / len(real)
+        nb_points = resample(nb_points)
+    else:
+        has_data = np.zeros(nb_properties, dtype=bool)
+
+    nb_citations = rng.geometric(1 / 30, size=nb_properties) - 1
+
+    properties = htm.PropertiesGroup()
+    for i in range(nb_properties):
+        kwargs = {
+            group_infos["pre_exp_arg"]: pre_exp[i],
+            group_infos["act_energy_arg"]: act_energy[i],
+            "material": str(materials[i]),
+            "isotope": str(isotopes[i]),
+            "author": f"synthetic{authors[i]}",
+            "year": int(years[i]),
+            "range": tuple(ranges[i]),
+            "source": "synthetic",
+        }
+        if has_data[i]:
+            data_T = np.sort(rng.uniform(*ranges[i], size=nb_points[i]))
+            data_y = (
+                pre_exp[i]
+                * np.exp(-act_energy[i] / htm.k_B / data_T)
+                * rng.lognormal(0, 0.1, size=nb_points[i])
+            )
+            kwargs.update(data_T=data_T, data_y=data_y)
+        if group_infos["prop_class"] is htm.Solubility:
+            kwargs["units"] = group_infos["units_options"][0]
+        prop = group_infos["prop_class"](**kwargs)
+        if group_infos["units"] is None and not hasattr(prop, "units"):
+            prop.units = group_infos["units_options"][0]
+        prop.nb_citations = int(nb_citations[i])
+        properties.append(prop)
+    return properties
@@ -6,55 +6,84 @@ import dash_daq as daq
 import h_transport_materials as htm
 import numpy as np
 
+from . import dataset
+from .debounce import SLIDER_UPDATEMODE, FILTERS, make_filters
+from .groups import GROUPS, type_to_database, pre_exp_label, act_energy_label
+
 materials_options = np.unique([prop.material for prop in htm.database]).tolist()
 isotope_options = ["H", "D", "T"]
 
-pretty_label = {
-    "diffusivity": "Diffusivity",
-    "solubility": "Solubility",
-    "permeability": "Permeability",
-    "recombination_coeff": "Recombination coeff.",
-    "dissociation_coeff": "Dissociation coeff.",
-}
+envelope_options = [
+    {"label": "None", "value": "none"},
+    {"label": "10th-50th-90th", "value": "10,50,90"},
+    {"label": "25th-50th-75th", "value": "25,50,75"},
+    {"label": "5th-95th", "value": "5,95"},
+]
+
+pretty_label = {group: GROUPS[group]["label"] for group in GROUPS}
+
+
+# properties of the components of a tab kept in its dcc.Store when it
+# isn't displayed, as "<id without the group suffix>.<property>"
+TAB_STATE_PROPS = [
+    "material_filter.value",
+    "material_filter.options",
+    "isotope_filter.value",
+    "author_filter.value",
+    "author_filter.options",
+    "year_filter.value",
+    "colour-by.value",
+    "envelope.value",
+    "subtabs.active_tab",
+    "cluster_discrepancy.on",
+    "ranking_temperature.value",
+    "ranking_in_range.on",
+    "per_year_citations.on",
+]
 
 
 def make_tab(property: str):
-    """_summary_
+    """Makes an empty tab, its content is rendered by make_tab_content
+    when the tab is selected
 
     Args:
-        property (str): _description_
+        property (str): a group of GROUPS
 
     Returns:
         dbc.Tab: the tab
     """
+    assert property in GROUPS
 
-    assert property in ["diffusivity", "solubility", "recombination_coeff"]
+    return dbc.Tab(label=pretty_label[property], tab_id=property)
 
-    property_to_group = {
-        "diffusivity": htm.diffusivities,
-        "solubility": htm.solubilities,
-        "recombination_coeff": htm.recombination_coeffs,
-    }
 
-    all_properties = property_to_group[property]
+def make_tab_content(property: str, state=None):
+    """Makes the content of a tab
+
+    Args:
+        property (str): a group of GROUPS
+        state (dict, optional): values of TAB_STATE_PROPS saved when the
+            tab was last displayed. Defaults to None (initial values).
+
+    Returns:
+        html.Div: the content of the tab
+    """
+
+    assert property in GROUPS
+
+    all_properties = type_to_database[property]
 
     initial_material = "tungsten"
 
-    authors_options = np.unique(
-        [
-            prop.author.capitalize()
-            for prop in all_properties
-            if prop.material == "tungsten"
-        ]
-    ).tolist()
+    authors_options = dataset.author_options(property, materials=[initial_material])
 
-    years_options = [prop.year for prop in all_properties]
+    years_options = [prop.year for prop in all_properties] or [1950, 2022]
     min_year = min(years_options)
     max_year = max(years_options)
 
     table = make_table(property)
 
-    table_tab = dbc.Tab([table], label="Table")
+    table_tab = dbc.Tab([table], label="Table", tab_id="table")
 
     graph_tab = dbc.Tab(
         [
@@ -71,6 +100,15 @@ def make_tab(property: str):
                                         id=f"colour-by_{property}",
                                         style=dict(width="150px"),
                                     ),
+                                    html.Br(),
+                                    html.Label("Percentiles:"),
+                                    dcc.Dropdown(
+                                        options=envelope_options,
+                                        value="none",
+                                        id=f"envelope_{property}",
+                                        clearable=False,
+                                        style=dict(width="150px"),
+                                    ),
                                 ]
                             ),
                             dbc.Col(
@@ -90,15 +128,89 @@ def make_tab(property: str):
             )
         ],
         label="Graph",
+        tab_id="graph",
+    )
+
+    discrepancy_tab = dbc.Tab(
+        [
+            dbc.Card(
+                [
+                    html.H6(
+                        "Maximum ratio (in decades) between properties "
+                        "over their common temperature range",
+                        className="card-subtitle",
+                    ),
+                    daq.BooleanSwitch(
+                        label="Cluster",
+                        on=False,
+                        id=f"cluster_discrepancy_{property}",
+                        style={"width": "100px"},
+                    ),
+                    dcc.Graph(
+                        id=f"graph_discrepancy_{property}",
+                        style={"height": "600px"},
+                    ),
+                ],
+                body=True,
+                className="mb-2",
+            )
+        ],
+        label="Discrepancy",
+        tab_id="discrepancy",
+    )
+
+    ranges = [prop.range for prop in all_properties if prop.range is not None]
+    T_min = int(min([r[0] for r in ranges] or [300]) // 100 * 100)
+    T_max = int(-(-max([r[1] for r in ranges] or [1200]) // 100) * 100)
+
+    ranking_tab = dbc.Tab(
+        [
+            dbc.Card(
+                [
+                    html.H6(
+                        "Properties sorted by their value at a temperature",
+                        className="card-subtitle",
+                    ),
+                    html.Label("Temperature (K):"),
+                    dcc.Slider(
+                        id=f"ranking_temperature_{property}",
+                        min=T_min,
+                        max=T_max,
+                        step=10,
+                        updatemode="drag",
+                        value=min(max(600, T_min), T_max),
+                        marks=None,
+                        tooltip={"placement": "bottom", "always_visible": True},
+                    ),
+                    daq.BooleanSwitch(
+                        label="Only in range",
+                        on=False,
+                        id=f"ranking_in_range_{property}",
+                        style={"width": "150px"},
+                    ),
+                    make_ranking_table(property),
+                ],
+                body=True,
+                className="mb-2",
+            )
+        ],
+        label="Ranking",
+        tab_id="ranking",
     )
 
-    sub_tabs = dbc.Tabs([graph_tab, table_tab], id=f"subtabs_{property}")
+    sub_tabs = dbc.Tabs(
+        [graph_tab, table_tab, discrepancy_tab, ranking_tab],
+        id=f"subtabs_{property}",
+        active_tab="graph",
+    )
 
     controls = dbc.Card(
         [
             html.Label("Filter by material:"),
             dcc.Dropdown(
-                options=materials_options,
+                options=dataset.search_options(
+                    property, "material", "", selected=[initial_material]
+                ),
                 value=[initial_material],
                 multi=True,
                 id=f"material_filter_{property}",
@@ -122,7 +234,13 @@ def make_tab(property: str):
             html.Label("Filter by author:"),
             dcc.Dropdown(
                 value=authors_options,
-                options=authors_options,
+                options=dataset.search_options(
+                    property,
+                    "author",
+                    "",
+                    selected=authors_options,
+                    materials=[initial_material],
+                ),
                 multi=True,
                 id=f"author_filter_{property}",
             ),
@@ -140,6 +258,7 @@ def make_tab(property: str):
                 min=min_year,
                 max=max_year,
                 step=1,
+                updatemode=SLIDER_UPDATEMODE,
                 value=[min_year, max_year],
                 marks={
                     int(i): str(i)
@@ -182,14 +301,46 @@ def make_tab(property: str):
                         [
                             "Python",
                             dcc.Download(id=f"download-python_{property}"),
+                            dcc.Download(id=f"download-npz_{property}"),
                         ],
                         id=f"python_button_{property}",
                         color="primary",
                         style={"margin": "5px"},
                         n_clicks_timestamp="0",
                     ),
+                    dcc.Upload(
+                        dbc.Button(
+                            "Import properties",
+                            color="primary",
+                            style={"margin": "5px"},
+                        ),
+                        id=f"upload_{property}",
+                        accept=".csv,.json",
+                    ),
                 ]
             ),
+            html.Div(
+                [
+                    dbc.Progress(
+                        id=f"download_progress_{property}",
+                        value=0,
+                        style={"flex-grow": 1, "height": "20px"},
+                    ),
+                    dbc.Button(
+                        "Cancel",
+                        id=f"cancel_download_{property}",
+                        color="secondary",
+                        size="sm",
+                        style={"margin-left": "5px"},
+                    ),
+                ],
+                id=f"download_status_{property}",
+                style={"display": "none"},
+            ),
+            html.Div(
+                id=f"import_report_{property}",
+                style={"font-size": "12px", "maxHeight": "150px", "overflow-y": "auto"},
+            ),
         ],
         body=True,
     )
@@ -271,9 +422,8 @@ def make_tab(property: str):
         className="mb-2",
     )
 
-    tab = dbc.Tab(
-        label=pretty_label[property],
-        children=[
+    content = html.Div(
+        [
             dbc.Row(
                 [
                     dbc.Col(
@@ -299,17 +449,41 @@ def make_tab(property: str):
                 ],
                 justify="evenly",
             ),
+            dcc.Store(id=f"filters_{property}"),
         ],
     )
-    return tab
 
+    for key, value in (state or {}).items():
+        component_id, prop = key.rsplit(".", 1)
+        setattr(content[f"{component_id}_{property}"], prop, value)
+
+    content[f"filters_{property}"].data = make_filters(
+        *[content[f"{key}_filter_{property}"].value for key in FILTERS]
+    )
+
+    return content
 
-TABLE_KEYS = ["material", "pre_exp", "act_energy", "range", "author", "doi"]
+
+TABLE_KEYS = [
+    "material",
+    "pre_exp",
+    "act_energy",
+    "range",
+    "author",
+    "doi",
+    "refit_pre_exp",
+    "refit_act_energy",
+    "refit_deviation",
+]
 
 prop_key_to_label = {
-    "diffusivity": {"pre_exp": "D_0 (m2/s)", "act_energy": "E_D (eV)"},
-    "solubility": {"pre_exp": "S_0", "act_energy": "E_S (eV)"},
-    "recombination_coeff": {"pre_exp": "Kr_0 (m4/s)", "act_energy": "E_Kr (eV)"},
+    group: {
+        "pre_exp": pre_exp_label(group),
+        "act_energy": act_energy_label(group),
+        "refit_pre_exp": "Refit " + pre_exp_label(group),
+        "refit_act_energy": "Refit " + act_energy_label(group),
+    }
+    for group in GROUPS
 }
 
 key_to_label = {
@@ -317,6 +491,7 @@ key_to_label = {
     "range": "Range (K)",
     "author": "Author",
     "doi": "DOI",
+    "refit_deviation": "Refit deviation (decades)",
 }
 
 
@@ -354,3 +529,29 @@ def make_table(property):
     )
 
     return table
+
+
+RANKING_KEYS = ["rank", "material", "isotope", "author", "year", "value", "in_range"]
+
+
+def make_ranking_table(property):
+    """Makes the table of the ranking view, paginated on the server"""
+    labels = {
+        "rank": "Rank",
+        "material": "Material",
+        "isotope": "Isotope",
+        "author": "Author",
+        "year": "Year",
+        "value": "{} at T".format(GROUPS[property]["symbol"]),
+        "in_range": "T in range",
+    }
+    return dash_table.DataTable(
+        id=f"ranking_table_{property}",
+        columns=[{"name": labels[key], "id": key} for key in RANKING_KEYS],
+        data=[],
+        page_action="custom",
+        page_current=0,
+        page_size=10,
+        editable=False,
+        style_table={"overflowX": "auto"},
+    )
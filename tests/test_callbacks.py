@@ -0,0 +1,60 @@
+import contextvars
+
+import pytest
+from dash._callback_context import context_value
+from dash._utils import AttributeDict
+
+from htm_dashboard import callbacks, dataset
+from htm_dashboard.groups import type_to_database
+
+
+# no other group is derived from it
+GROUP = "recombination_coeff"
+
+
+@pytest.fixture
+def database():
+    """Removes the properties added by a test"""
+    nb_properties = len(type_to_database[GROUP])
+    yield type_to_database[GROUP]
+    del type_to_database[GROUP][nb_properties:]
+    dataset.versions[GROUP] += 1
+
+
+def run_callback(function, triggered, *args):
+    """Runs a callback function as if triggered by the prop_id triggered"""
+    context = AttributeDict(triggered_inputs=[{"prop_id": triggered, "value": 1}])
+
+    def run():
+        context_value.set(context)
+        return function(*args)
+
+    return contextvars.copy_context().run(run)
+
+
+def test_add_property_refreshes_the_options(database):
+    add_property = callbacks.make_add_property(GROUP)
+
+    error_message, _, material_options, author_options = run_callback(
+        add_property,
+        f"submit_new_{GROUP}.n_clicks",
+        1,  # n_clicks
+        None,  # upload_contents
+        1e-20,  # new_pre_exp
+        0.5,  # new_act_energy
+        "Zzyzx",  # new_author
+        2020,  # new_year
+        "H",  # new_isotope
+        "unobtainium",  # new_material
+        None,  # new_range_low
+        None,  # new_range_high
+        None,  # upload_filename
+        ["unobtainium"],  # material_filter
+        [],  # author_filter
+        None,  # material_search
+        "zzy",  # author_search
+    )
+
+    assert error_message == ""
+    assert material_options[0]["value"] == "unobtainium"
+    assert "Zzyzx" in [option["value"] for option in author_options]
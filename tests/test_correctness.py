@@ -0,0 +1,138 @@
+"""Checks the vectorised functions against straightforward implementations
+on the real database"""
+import h_transport_materials as htm
+import numpy as np
+import pandas as pd
+import pytest
+
+from htm_dashboard import bulk_import, permeability, statistics
+from htm_dashboard.groups import type_to_database
+
+
+GROUPS = ["diffusivity", "solubility", "permeability"]
+
+
+@pytest.mark.parametrize("group", GROUPS)
+def test_refit_matches_polyfit(group):
+    properties = type_to_database[group]
+    fit = statistics.refit(statistics.to_arrays(properties))
+
+    nb_checked = 0
+    for i, prop in enumerate(properties):
+        if prop.data_T is None:
+            assert np.isnan(fit["pre_exp"][i])
+            continue
+        T = np.asarray(prop.data_T, dtype=float)
+        y = np.asarray(prop.data_y, dtype=float)
+        valid = (T > 0) & (y > 0)
+        if len(np.unique(T[valid])) < 2:
+            assert np.isnan(fit["pre_exp"][i])
+            continue
+        slope, intercept = np.polyfit(1 / T[valid], np.log(y[valid]), 1)
+        assert fit["nb_points"][i] == valid.sum()
+        assert fit["act_energy"][i] == pytest.approx(-slope * htm.k_B, rel=1e-6)
+        assert np.log(fit["pre_exp"][i]) == pytest.approx(intercept, abs=1e-6)
+        nb_checked += 1
+
+    if nb_checked == 0:
+        pytest.skip(f"no {group} with experimental points")
+
+
+@pytest.mark.parametrize("group", GROUPS)
+def test_discrepancy_matches_dense_grid(group):
+    properties = type_to_database[group][:60]
+    arrays = statistics.to_arrays(properties)
+    matrix = statistics.discrepancy(arrays, chunk_size=7)
+
+    def log10_value(i, T):
+        return np.log10(arrays["pre_exp"][i]) - arrays["act_energy"][i] / (
+            htm.k_B * T * np.log(10)
+        )
+
+    for i in range(len(properties)):
+        for j in range(len(properties)):
+            low = max(arrays["range_low"][i], arrays["range_low"][j])
+            high = min(arrays["range_high"][i], arrays["range_high"][j])
+            if low > high:
+                assert np.isnan(matrix[i, j])
+                continue
+            T = np.linspace(low, high, num=1001)
+            expected = np.abs(log10_value(i, T) - log10_value(j, T)).max()
+            assert matrix[i, j] == pytest.approx(expected, rel=1e-9, abs=1e-9)
+
+
+@pytest.mark.parametrize("pairing", ["material", "author", "year"])
+def test_join_matches_nested_loop(pairing):
+    diffusivities, solubilities = htm.diffusivities, htm.solubilities
+    d_indices, s_indices = permeability.join(diffusivities, solubilities, pairing)
+
+    def key(prop):
+        return tuple(
+            value.lower() if isinstance(value, str) else value
+            for value in (
+                getattr(prop, attr) for attr in permeability.pairing_to_keys[pairing]
+            )
+        )
+
+    def range_of(prop):
+        return prop.range if prop.range is not None else (300, 1200)
+
+    expected = set()
+    for i, D in enumerate(diffusivities):
+        for j, S in enumerate(solubilities):
+            if key(D) != key(S):
+                continue
+            if max(range_of(D)[0], range_of(S)[0]) < min(
+                range_of(D)[1], range_of(S)[1]
+            ):
+                expected.add((i, j))
+
+    pairs = list(zip(d_indices.tolist(), s_indices.tolist()))
+    assert expected
+    assert len(pairs) == len(set(pairs))
+    assert set(pairs) == expected
+
+
+def test_validate_malformed_table():
+    table = pd.DataFrame(
+        {
+            "material": ["tungsten", "", "tungsten", "nickel", "nickel", "copper"],
+            "isotope": ["h", "H", "X", "D", "T", "H"],
+            "author": ["smith", "smith", "smith", "doe", "doe", "doe"],
+            "year": [2020, 2020, 2020, 2020.5, 2021, 2021],
+            "pre_exp": [1e-7, 1e-7, 1e-7, 1e-7, -1, "abc"],
+            "act_energy": [0.2, 0.2, 0.2, 0.2, 0.2, 0.2],
+            "range_low": [None, 300, 300, 300, 300, 900],
+            "range_high": [None, 900, 900, 900, 900, 600],
+        }
+    )
+    valid, errors = bulk_import.validate(table, "diffusivity")
+
+    assert valid["material"].tolist() == ["tungsten"]
+    assert valid["isotope"].tolist() == ["H"]
+    assert valid[["range_low", "range_high"]].values.tolist() == [
+        list(bulk_import.DEFAULT_RANGE)
+    ]
+    assert errors == [
+        {"row": 2, "error": "material is empty"},
+        {"row": 3, "error": "isotope must be H, D or T"},
+        {"row": 4, "error": "year must be an integer"},
+        {"row": 5, "error": "pre_exp must be a positive number"},
+        {"row": 6, "error": "pre_exp must be a positive number"},
+        {"row": 6, "error": "range must satisfy 0 < range_low < range_high"},
+    ]
+
+
+def test_validate_missing_columns():
+    table = pd.DataFrame({"material": ["tungsten"], "pre_exp": [1e-7]})
+    valid, errors = bulk_import.validate(table, "diffusivity")
+
+    assert len(valid) == 0
+    assert errors == [
+        {"row": None, "error": "missing columns: isotope, author, year, act_energy"}
+    ]
+
+
+def test_read_table_duplicate_columns():
+    with pytest.raises(ValueError, match="duplicate columns: material"):
+        bulk_import.read_table(b"Material,material\ntungsten,nickel\n", "table.csv")
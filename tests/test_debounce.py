@@ -0,0 +1,58 @@
+import pytest
+
+from htm_dashboard import debounce
+
+
+@pytest.fixture(autouse=True)
+def clear_latest():
+    debounce._latest.clear()
+    yield
+    debounce._latest.clear()
+
+
+def make_filters(client, sequence):
+    filters = debounce.make_filters(["tungsten"], ["H"], ["frauenfelder"], [1950, 2022])
+    filters.update(client=client, sequence=sequence)
+    return filters
+
+
+def test_initial_filters_are_never_stale():
+    assert not debounce.is_stale("diffusivity", make_filters(None, 0))
+    assert not debounce.is_stale("diffusivity", make_filters(None, 0))
+    assert len(debounce._latest) == 0
+
+
+def test_out_of_order_sequences():
+    assert not debounce.is_stale("diffusivity", make_filters("a", 1))
+    assert not debounce.is_stale("diffusivity", make_filters("a", 3))
+    # sequence 2 arrived after sequence 3
+    assert debounce.is_stale("diffusivity", make_filters("a", 2))
+    assert debounce.is_stale("diffusivity", make_filters("a", 1))
+    # the same request can be checked again
+    assert not debounce.is_stale("diffusivity", make_filters("a", 3))
+    assert not debounce.is_stale("diffusivity", make_filters("a", 4))
+
+
+def test_sequences_are_per_client_and_group():
+    assert not debounce.is_stale("diffusivity", make_filters("a", 5))
+    assert not debounce.is_stale("diffusivity", make_filters("b", 1))
+    assert not debounce.is_stale("solubility", make_filters("a", 1))
+    assert debounce.is_stale("diffusivity", make_filters("a", 4))
+
+
+def test_least_recently_used_entries_are_evicted(monkeypatch):
+    monkeypatch.setattr(debounce, "MAX_ENTRIES", 3)
+    for client in ["a", "b", "c"]:
+        debounce.is_stale("diffusivity", make_filters(client, 10))
+    # "a" is used again so "b" is the least recently used
+    debounce.is_stale("diffusivity", make_filters("a", 11))
+    debounce.is_stale("diffusivity", make_filters("d", 10))
+
+    assert list(debounce._latest) == [
+        ("c", "diffusivity"),
+        ("a", "diffusivity"),
+        ("d", "diffusivity"),
+    ]
+    # the sequence of "b" was forgotten, that of "a" is kept
+    assert not debounce.is_stale("diffusivity", make_filters("b", 1))
+    assert debounce.is_stale("diffusivity", make_filters("a", 10))
@@ -0,0 +1,84 @@
+import pytest
+
+from htm_dashboard import dataset, search
+
+
+NAMES = [
+    "Völkl-Alefeld",
+    "Frauenfelder",
+    "Esteban",
+    "Causey",
+    "tungsten",
+    "Tungsten carbide",
+    "copper",
+    "Eutectic lead lithium",
+    "lead",
+]
+
+
+@pytest.fixture
+def index():
+    return search.make_index(NAMES)
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("Völkl-Alefeld", "volkl alefeld"),
+        ("  TUNGSTEN  ", "tungsten"),
+        ("Ésteban", "esteban"),
+        ("lead_lithium (eutectic)", "lead lithium eutectic"),
+    ],
+)
+def test_normalize(name, expected):
+    assert search.normalize(name) == expected
+
+
+@pytest.mark.parametrize("query", ["volkl", "VÖLKL", "Volkl-alefeld"])
+def test_search_ignores_case_and_accents(index, query):
+    assert search.search(index, query) == ["Völkl-Alefeld"]
+
+
+def test_search_prefix_before_word_prefix(index):
+    # "lead" starts with the query, "Eutectic lead lithium" has a word
+    # starting with it
+    assert search.search(index, "lea") == ["lead", "Eutectic lead lithium"]
+    assert search.search(index, "alef") == ["Völkl-Alefeld"]
+
+
+def test_search_substring(index):
+    assert search.search(index, "ten") == ["tungsten", "Tungsten carbide"]
+    assert search.search(index, "ppe") == ["copper"]
+
+
+def test_search_close_matches(index):
+    assert search.search(index, "fraunfelder") == ["Frauenfelder"]
+    # close to a name, then to a word of a name
+    assert search.search(index, "tungstne") == ["tungsten", "Tungsten carbide"]
+    assert search.search(index, "zzzz") == []
+
+
+def test_search_limit(index):
+    assert search.search(index, "", limit=3) == NAMES[:3]
+    assert len(search.search(index, "e", limit=2)) == 2
+
+
+def test_search_options_keep_selected_values():
+    options = dataset.search_options(
+        "diffusivity", "material", "", selected=["nickel", "copper"]
+    )
+    values = [option["value"] for option in options]
+
+    assert values[:2] == ["nickel", "copper"]
+    assert len(values) == len(set(values))
+
+
+def test_search_options_are_not_hidden_by_the_dropdown():
+    # the dropdown only shows the options whose label or "search" contains
+    # the typed text: accent-insensitive and close matches get the text in
+    # their "search" field
+    options = dataset.search_options("diffusivity", "material", "tungstne")
+
+    assert options[0]["value"] == "tungsten"
+    for option in options:
+        assert "tungstne" in option["search"]
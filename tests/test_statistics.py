@@ -0,0 +1,79 @@
+import h_transport_materials as htm
+import numpy as np
+import pytest
+
+from htm_dashboard import dataset, statistics
+from htm_dashboard.graph import make_group_of_properties
+
+
+GROUPS = ["diffusivity", "solubility", "permeability"]
+
+
+def filter_group(group, materials):
+    return make_group_of_properties(
+        type_of_prop=group,
+        materials=materials,
+        authors=dataset.author_options(group),
+        isotopes=["H", "D", "T"],
+    )
+
+
+@pytest.mark.parametrize("group", GROUPS)
+@pytest.mark.parametrize("materials", [["tungsten"], ["tungsten", "nickel"], None])
+def test_mean_matches_htm(group, materials):
+    properties = filter_group(group, materials or dataset.material_options(group))
+    if len(properties) == 0:
+        pytest.skip(f"no {group} for {materials}")
+
+    pre_exp, act_energy = statistics.mean(statistics.to_arrays(properties))
+    expected_pre_exp, expected_act_energy = properties.mean()
+
+    assert pre_exp == pytest.approx(expected_pre_exp, rel=1e-6)
+    assert act_energy == pytest.approx(expected_act_energy, rel=1e-6, abs=1e-9)
+
+
+@pytest.mark.parametrize("group", GROUPS)
+def test_mean_curve_uses_mean(group):
+    properties = filter_group(group, ["tungsten"])
+    arrays = statistics.to_arrays(properties)
+    curve = statistics.mean_curve(arrays)
+
+    pre_exp, act_energy = statistics.mean(arrays)
+    assert curve["pre_exp"] == pre_exp
+    assert curve["act_energy"] == act_energy
+    # nan where no property is defined
+    defined = ~np.isnan(curve["low"])
+    assert np.array_equal(defined, ~np.isnan(curve["high"]))
+    assert np.all(curve["low"][defined] <= curve["high"][defined])
+
+
+@pytest.mark.parametrize("group", GROUPS)
+@pytest.mark.parametrize("max_elements", [5_000_000, 1, 1000])
+def test_envelope_matches_percentile(group, max_elements):
+    properties = filter_group(group, dataset.material_options(group))
+    arrays = statistics.to_arrays(properties)
+    # covers temperatures where no property is defined
+    T = np.linspace(100, 3000, num=301)
+    percentiles = (0, 10, 50, 90, 100)
+
+    result, count = statistics.envelope(
+        arrays, T, percentiles, max_elements=max_elements
+    )
+
+    for j, temperature in enumerate(T):
+        log_values = [
+            np.log(pre_exp) - act_energy / htm.k_B / temperature
+            for pre_exp, act_energy, low, high in zip(
+                arrays["pre_exp"],
+                arrays["act_energy"],
+                arrays["range_low"],
+                arrays["range_high"],
+            )
+            if low <= temperature <= high
+        ]
+        assert count[j] == len(log_values)
+        if not log_values:
+            assert np.all(np.isnan(result[:, j]))
+            continue
+        expected = np.exp(np.percentile(log_values, percentiles))
+        assert result[:, j] == pytest.approx(expected, rel=1e-9)